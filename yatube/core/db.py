@@ -0,0 +1,14 @@
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Выполняет settings.SQLITE_PRAGMAS на новом соединении с SQLite.
+
+    PRAGMA вроде synchronous действуют только на соединение, поэтому их
+    нельзя выставить один раз при выкладке.
+    """
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
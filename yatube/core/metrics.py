@@ -0,0 +1,132 @@
+"""Гистограммы времени обработки запросов, общие для процесса."""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Верхние границы корзин: миллисекунды для времени, байты для размера.
+TIME_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = tuple(2 ** power for power in range(10, 24, 2))
+
+METRIC_BUCKETS = {
+    'wall_ms': TIME_BUCKETS,
+    'sql_count': COUNT_BUCKETS,
+    'sql_ms': TIME_BUCKETS,
+    'template_ms': TIME_BUCKETS,
+    'response_bytes': SIZE_BUCKETS,
+}
+PERCENTILES = (50, 90, 99)
+
+_lock = threading.Lock()
+_histograms = {}
+_local = threading.local()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percent):
+        """Верхняя граница корзины, в которую попал процентиль; None, если
+        замеров нет или процентиль выше последней границы."""
+        if not self.count:
+            return None
+        rank = percent / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def as_dict(self):
+        data = {
+            'count': self.count,
+            'sum': round(self.total, 3),
+            'buckets': dict(zip(
+                [str(bound) for bound in self.buckets] + ['+Inf'],
+                self.counts
+            )),
+        }
+        for percent in PERCENTILES:
+            data[f'p{percent}'] = self.percentile(percent)
+        return data
+
+
+def record(name, values):
+    """Добавляет замеры одного запроса к гистограммам представления."""
+    with _lock:
+        histograms = _histograms.setdefault(name, {
+            metric: Histogram(buckets)
+            for metric, buckets in METRIC_BUCKETS.items()
+        })
+        for metric, value in values.items():
+            if value is not None:
+                histograms[metric].observe(value)
+
+
+def snapshot():
+    with _lock:
+        return {
+            name: {metric: histogram.as_dict()
+                   for metric, histogram in histograms.items()}
+            for name, histograms in _histograms.items()
+        }
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+@contextmanager
+def template_timer():
+    """Собирает время отрисовки шаблонов в текущем потоке."""
+    _local.template_seconds = 0.0
+    _local.template_depth = 0
+    try:
+        yield _local
+    finally:
+        del _local.template_depth
+
+
+@contextmanager
+def timing_template():
+    """Оборачивает отрисовку шаблона; вложенные отрисовки не суммируются."""
+    depth = getattr(_local, 'template_depth', None)
+    if depth is None:
+        yield
+        return
+    _local.template_depth = depth + 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.template_depth = depth
+        if not depth:
+            _local.template_seconds += time.perf_counter() - started
+
+
+class SqlTimer:
+    """Обёртка для connection.execute_wrapper: число и время запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
@@ -0,0 +1,63 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+
+class RequestMetricsMiddleware:
+    """Замеряет часть запросов и копит гистограммы по имени URL.
+
+    Доля замеряемых запросов — METRICS_SAMPLE_RATE; остальные проходят
+    без накладных расходов, кроме одного вызова random().
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+        sql = metrics.SqlTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(sql))
+            templates = stack.enter_context(metrics.template_timer())
+            response = self.get_response(request)
+            template_seconds = templates.template_seconds
+        wall = time.perf_counter() - started
+        match = request.resolver_match
+        metrics.record(match.view_name if match else '<unresolved>', {
+            'wall_ms': wall * 1000,
+            'sql_count': sql.count,
+            'sql_ms': sql.seconds * 1000,
+            'template_ms': template_seconds * 1000,
+            'response_bytes': (None if response.streaming
+                               else len(response.content)),
+        })
+        return response
+
+
+class ReplicaStickinessMiddleware:
+    """После записи отправляет чтения пользователя в основную базу.
+
+    Кука живёт REPLICA_STICKY_SECONDS — столько, сколько реплики могут
+    отставать; пока она есть, core.routers.read_only не читает реплики.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (settings.DATABASE_REPLICAS
+                and request.method not in ('GET', 'HEAD', 'OPTIONS')
+                and response.status_code < 400):
+            response.set_cookie(settings.REPLICA_STICKY_COOKIE, '1',
+                                max_age=settings.REPLICA_STICKY_SECONDS,
+                                httponly=True)
+        return response
@@ -0,0 +1,69 @@
+"""Чтение лент с реплик базы.
+
+Реплики перечислены в settings.DATABASE_REPLICAS; их копирует с
+основной базы внешний процесс, поэтому они могут отставать. Запросы
+уходят на реплику, только пока выполняется представление, помеченное
+read_only; всё остальное, включая админку и любые записи, идёт в
+основную базу. Пока у пользователя есть кука REPLICA_STICKY_COOKIE
+(её ставит ReplicaStickinessMiddleware после записи), он тоже читает
+основную базу и сразу видит свой пост.
+
+Всё, что кладёт прочитанное в общий кеш, читает основную базу (см.
+primary): иначе строки отстающей реплики легли бы в кеш под текущим
+поколением и пережили бы её отставание.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_replicas_allowed = ContextVar('replicas_allowed', default=False)
+
+
+def replicas_allowed():
+    return bool(settings.DATABASE_REPLICAS) and _replicas_allowed.get()
+
+
+def is_sticky(request):
+    return settings.REPLICA_STICKY_COOKIE in request.COOKIES
+
+
+def read_only(view):
+    """Разрешает представлению читать с реплик, если не было записи."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or is_sticky(request):
+            return view(request, *args, **kwargs)
+        token = _replicas_allowed.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replicas_allowed.reset(token)
+    return wrapper
+
+
+@contextmanager
+def primary():
+    """Читает основную базу внутри блока, даже в read_only-представлении."""
+    token = _replicas_allowed.set(False)
+    try:
+        yield
+    finally:
+        _replicas_allowed.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if replicas_allowed():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной базе.
+        return True
@@ -0,0 +1,64 @@
+import copy
+
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+from .metrics import timing_template
+
+DEFAULT_LOADERS = (
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+)
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+
+
+def production_templates(templates, precompile=()):
+    """Копия настройки TEMPLATES для продакшена.
+
+    Шаблоны компилируются один раз на процесс кеширующим загрузчиком,
+    шаблоны из precompile — сразу при создании движка, отладочная
+    информация для страниц ошибок не собирается.
+    """
+    templates = copy.deepcopy(templates)
+    for config in templates:
+        options = config.setdefault('OPTIONS', {})
+        app_dirs = config.pop('APP_DIRS', False)
+        loaders = options.get('loaders') or (
+            DEFAULT_LOADERS if app_dirs else DEFAULT_LOADERS[:1]
+        )
+        config['APP_DIRS'] = False
+        options.update(debug=False,
+                       loaders=[(CACHED_LOADER, list(loaders))],
+                       precompile=list(precompile))
+    return templates
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        with timing_template():
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Стандартный бэкенд, который отдаёт время отрисовки в метрики.
+
+    OPTIONS['precompile'] — шаблоны, которые загрузить заранее; имеет
+    смысл только с кеширующим загрузчиком.
+    """
+
+    def __init__(self, params):
+        params = params.copy()
+        options = params['OPTIONS'] = params['OPTIONS'].copy()
+        precompile = options.pop('precompile', ())
+        super().__init__(params)
+        for template_name in precompile:
+            self.engine.get_template(template_name)
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import metrics
+
+User = get_user_model()
+
+
+@override_settings(METRICS_SAMPLE_RATE=1)
+class RequestMetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        metrics.reset()
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_request_is_recorded_by_url_name(self):
+        response = self.guest_client.get(reverse('posts:index'))
+        views = metrics.snapshot()
+        self.assertEqual(list(views), ['posts:index'])
+        index = views['posts:index']
+        for metric in ('wall_ms', 'sql_count', 'sql_ms', 'template_ms',
+                       'response_bytes'):
+            with self.subTest(metric=metric):
+                self.assertEqual(index[metric]['count'], 1)
+        self.assertGreater(index['sql_count']['sum'], 0)
+        self.assertGreater(index['template_ms']['sum'], 0)
+        self.assertLessEqual(index['template_ms']['sum'],
+                             index['wall_ms']['sum'])
+        self.assertEqual(index['response_bytes']['sum'],
+                         len(response.content))
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_recorded(self):
+        self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(metrics.snapshot(), {})
+
+    def test_histogram_percentiles(self):
+        histogram = metrics.Histogram(metrics.TIME_BUCKETS)
+        for value in [3] * 90 + [150] * 9 + [10000]:
+            histogram.observe(value)
+        self.assertEqual(histogram.percentile(50), 5)
+        self.assertEqual(histogram.percentile(99), 200)
+        self.assertIsNone(histogram.percentile(100))
+
+    def test_empty_histogram_has_no_percentiles(self):
+        histogram = metrics.Histogram(metrics.TIME_BUCKETS)
+        for percent in metrics.PERCENTILES:
+            self.assertIsNone(histogram.percentile(percent))
+        self.assertIsNone(histogram.as_dict()['p50'])
+
+    def test_endpoint_is_protected(self):
+        url = reverse('core:metrics')
+        self.assertEqual(self.guest_client.get(url).status_code,
+                         HTTPStatus.FORBIDDEN)
+        response = self.staff_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('core:metrics', response.json()['views'])
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_accepts_token(self):
+        url = reverse('core:metrics')
+        response = self.guest_client.get(url,
+                                         HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.guest_client.get(url,
+                                         HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
@@ -0,0 +1,124 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import (Client, RequestFactory, SimpleTestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+from ..routers import ReplicaRouter, read_only
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request):
+        @read_only
+        def view(request):
+            return (self.router.db_for_read(Post),
+                    self.router.db_for_write(Post))
+        return view(request)
+
+    def test_read_only_views_read_replicas(self):
+        self.assertEqual(self.route(self.factory.get('/')),
+                         ('replica', 'default'))
+
+    def test_other_requests_use_primary(self):
+        sticky = self.factory.get('/')
+        sticky.COOKIES['primary_db'] = '1'
+        for request in (self.factory.post('/'), sticky):
+            with self.subTest(method=request.method):
+                self.assertEqual(self.route(request), ('default', 'default'))
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_goes_to_primary(self):
+        self.assertEqual(self.route(self.factory.get('/')),
+                         ('default', 'default'))
+
+
+class ReplicaReadsTest(TransactionTestCase):
+    """Основная база — тестовая, реплика — отдельный файл SQLite.
+
+    Реплика не получает новых данных, то есть «отстаёт» навсегда: что
+    видно на странице, сразу показывает, откуда она прочитана.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.databases['replica'] = {
+            **connections['default'].settings_dict,
+            'NAME': os.path.join(cls.directory.name, 'replica.sqlite3'),
+        }
+        call_command('migrate', database='replica', verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections.databases['replica']
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        Post.objects.create(text='Старый пост', author=self.user)
+
+    def index_posts(self, client):
+        response = client.get(reverse('posts:index'))
+        return [post.text for post in response.context['page_obj']]
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_feeds_read_replica_until_author_writes(self):
+        for workers in (0, 2):
+            with self.subTest(concurrent_queries=workers):
+                with self.settings(CONCURRENT_QUERIES=workers):
+                    self.assertEqual(self.index_posts(Client()), [])
+        client = Client()
+        client.force_login(self.user)
+        response = client.post(reverse('posts:post_create'),
+                               {'text': 'Новый пост'})
+        self.assertIn('primary_db', response.cookies)
+        self.assertEqual(self.index_posts(client),
+                         ['Новый пост', 'Старый пост'])
+        post = Post.objects.get(text='Новый пост')
+        response = client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertEqual(response.context['post'], post)
+        # Без куки ни сессии, ни постов на реплике ещё нет.
+        del client.cookies['primary_db']
+        self.assertEqual(self.index_posts(client), [])
+        self.assertEqual(Post.objects.using('replica').count(), 0)
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_cached_data_is_read_from_primary(self):
+        Group.objects.create(title='Группа', slug='group')
+        for name, options in (('page', {'FEED_CACHE_TIMEOUT': 60}),
+                              ('timeline', {'TIMELINE_SIZE': 5})):
+            with self.subTest(cache=name), self.settings(**options):
+                cache.clear()
+                self.assertEqual(self.index_posts(Client()), ['Старый пост'])
+        with self.settings(LOOKUP_CACHE_TIMEOUT=60):
+            response = Client().get(reverse('posts:group_list',
+                                            kwargs={'slug': 'group'}))
+        # Группа найдена в основной базе, посты прочитаны с реплики.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['page_obj']), [])
+
+    def test_without_replicas_nothing_is_read_from_replica(self):
+        self.assertEqual(self.index_posts(Client()), ['Старый пост'])
+        response = Client().post(reverse('users:login'), {})
+        self.assertNotIn('primary_db', response.cookies)
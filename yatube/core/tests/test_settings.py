@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..db import apply_sqlite_pragmas
+
+PRINT_SETTINGS = '''
+import json
+from django.conf import settings
+print(json.dumps({
+    'debug': settings.DEBUG,
+    'conn_max_age': settings.DATABASES['default'].get('CONN_MAX_AGE', 0),
+    'pragmas': settings.SQLITE_PRAGMAS,
+    'cache': settings.CACHES['default']['BACKEND'],
+    'loaders': settings.TEMPLATES[0]['OPTIONS'].get('loaders'),
+    'middleware': settings.MIDDLEWARE,
+    'apps': settings.INSTALLED_APPS,
+}))
+'''
+
+
+class SettingsProfilesTest(SimpleTestCase):
+    def load(self, **env):
+        environ = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'yatube.settings',
+                   **env}
+        output = subprocess.run(
+            [sys.executable, '-c', PRINT_SETTINGS], env=environ,
+            cwd=settings.BASE_DIR, check=True, capture_output=True,
+            text=True,
+        ).stdout
+        return json.loads(output)
+
+    def test_dev_is_default_profile(self):
+        dev = self.load(YATUBE_PROFILE='dev')
+        self.assertEqual(self.load(), dev)
+        self.assertTrue(dev['debug'])
+        self.assertEqual(dev['conn_max_age'], 0)
+        self.assertEqual(dev['pragmas'], {})
+
+    def test_prod_profile_is_tuned(self):
+        prod = self.load(YATUBE_PROFILE='prod', SECRET_KEY='secret')
+        dev = self.load()
+        self.assertFalse(prod['debug'])
+        self.assertGreater(prod['conn_max_age'], 0)
+        self.assertEqual(prod['pragmas']['journal_mode'], 'wal')
+        self.assertIn('MemcachedCache', prod['cache'])
+        self.assertEqual(prod['loaders'][0][0],
+                         'django.template.loaders.cached.Loader')
+        self.assertIn('django.middleware.gzip.GZipMiddleware',
+                      prod['middleware'])
+        self.assertIn('django.middleware.http.ConditionalGetMiddleware',
+                      prod['middleware'])
+        self.assertEqual(prod['apps'], dev['apps'])
+
+
+class SqlitePragmasTest(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -1234,
+                                       'temp_store': 'memory'})
+    def test_pragmas_are_applied_to_new_connections(self):
+        # Отдельное соединение: часть PRAGMA нельзя менять в транзакции
+        # теста.
+        new_connection = connection.copy()
+        self.addCleanup(new_connection.close)
+        with new_connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -1234)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_no_pragmas_by_default(self):
+        with connection.cursor() as cursor:
+            apply_sqlite_pragmas(sender=None, connection=connection)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -2000)
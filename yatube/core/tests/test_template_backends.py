@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..template_backends import production_templates
+
+
+class ProductionTemplatesTest(TestCase):
+    def test_profile_wraps_loaders_in_cached_loader(self):
+        templates = production_templates(settings.TEMPLATES,
+                                         ['posts/index.html'])
+        config = templates[0]
+        self.assertFalse(config['APP_DIRS'])
+        self.assertFalse(config['OPTIONS']['debug'])
+        self.assertEqual(config['OPTIONS']['loaders'], [(
+            'django.template.loaders.cached.Loader',
+            ['django.template.loaders.filesystem.Loader',
+             'django.template.loaders.app_directories.Loader'],
+        )])
+        # Исходная настройка не меняется.
+        self.assertTrue(settings.TEMPLATES[0]['APP_DIRS'])
+
+    def test_templates_are_precompiled_and_pages_render(self):
+        templates = production_templates(
+            settings.TEMPLATES, ['posts/includes/post_card.html']
+        )
+        with override_settings(TEMPLATES=templates):
+            loader = engines.all()[0].engine.template_loaders[0]
+            self.assertIsInstance(loader, CachedLoader)
+            self.assertIn('posts/includes/post_card.html',
+                          loader.get_template_cache)
+            response = Client().get(reverse('posts:index'))
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('posts/index.html', loader.get_template_cache)
@@ -0,0 +1,214 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from importlib import import_module
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.db import (DEFAULT_DB_ALIAS, OperationalError, connection,
+                       connections)
+from django.test import (SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts.models import AuthorStats, Group, Post
+
+from .. import writer
+
+User = get_user_model()
+
+THREADS = 8
+WRITES_PER_THREAD = 25
+READERS = 4
+# Записей в секунду, ниже которых тест падает. По умолчанию граница взята
+# с большим запасом: на обычном диске с WAL выходит в десятки раз больше,
+# и медленная машина CI не даёт ложных падений.
+MIN_RATE = float(os.getenv('WRITE_STRESS_MIN_RATE', 20))
+
+
+def production_pragmas():
+    with mock.patch.dict(os.environ, SECRET_KEY='stress'):
+        return import_module('yatube.settings.prod').SQLITE_PRAGMAS
+
+
+def run_threads(*targets):
+    """Выполняет каждую цель в своём потоке и возвращает их исключения.
+
+    Потоки открывают собственные соединения с базой и закрывают их в
+    конце.
+    """
+    errors = []
+
+    def run(target):
+        try:
+            target()
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run, args=(target,))
+               for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class WriterQueueTest(SimpleTestCase):
+    @override_settings(SERIALIZE_WRITES=True)
+    def test_calls_run_in_single_writer_thread(self):
+        names = set()
+
+        def write():
+            names.add(threading.current_thread().name)
+            # Вложенный вызов не ждёт сам себя.
+            return writer.run(lambda: 'nested')
+
+        threads = [threading.Thread(target=writer.run, args=(write,))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names.pop().startswith('db-writer'))
+        self.assertEqual(writer.run(write), 'nested')
+
+    @override_settings(SERIALIZE_WRITES=True)
+    def test_exceptions_are_propagated(self):
+        def fail():
+            raise ValueError('ошибка записи')
+
+        with self.assertRaisesMessage(ValueError, 'ошибка записи'):
+            writer.run(fail)
+
+    @override_settings(SERIALIZE_WRITES=True)
+    def test_connection_is_checked_around_each_write(self):
+        def fail():
+            raise OperationalError('disk I/O error')
+
+        with mock.patch.object(writer, 'close_old_connections') as check:
+            with self.assertRaises(OperationalError):
+                writer.run(fail)
+        self.assertEqual(check.call_count, 2)
+
+    def test_disabled_runs_in_caller_thread(self):
+        self.assertEqual(writer.run(threading.current_thread),
+                         threading.current_thread())
+
+
+class WriteStressTest(TransactionTestCase):
+    """Одновременные записи в файловую базу с PRAGMA боевого сервера.
+
+    Посты создаются через очередь записи: это транзакции, которые
+    вставляют пост и обновляют счётчики автора и группы. Вход
+    пользователей и сессии пишут в обход очереди, как при обычных
+    запросах, а рядом идут чтения. С WAL и busy timeout ни одна операция
+    не должна получить "database is locked".
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'stress.sqlite3')
+        # Схема тестовой базы вместе с триггерами поиска.
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.close()
+        pragmas = override_settings(SERIALIZE_WRITES=True,
+                                    SQLITE_PRAGMAS=production_pragmas())
+        pragmas.enable()
+        self.addCleanup(pragmas.disable)
+        # Новые соединения других потоков открывают файл; у этого потока
+        # остаётся тестовая база в памяти.
+        settings_dict = connections.databases[DEFAULT_DB_ALIAS]
+        self.addCleanup(settings_dict.__setitem__, 'NAME',
+                        settings_dict['NAME'])
+        settings_dict['NAME'] = path
+        # Соединение потока записи закрывается, пока в настройках файл:
+        # соединение с базой в памяти Django не закрывает.
+        self.addCleanup(
+            lambda: writer.get_executor().submit(
+                connections.close_all
+            ).result()
+        )
+
+    def test_concurrent_writes_do_not_lock(self):
+        users = []
+        groups = []
+
+        def create_authors():
+            users.extend(User.objects.create_user(username=f'user{number}')
+                         for number in range(THREADS))
+            groups.append(Group.objects.create(title='Группа', slug='group'))
+
+        self.assertEqual(run_threads(create_authors), [])
+        group, = groups
+
+        def create_posts(user):
+            for i in range(WRITES_PER_THREAD):
+                writer.run(Post.objects.create, text=f'Пост {i}',
+                           author=user, group=group)
+
+        def log_in(user):
+            for _ in range(WRITES_PER_THREAD):
+                update_last_login(None, user)
+                SessionStore().create()
+
+        def read_feeds():
+            for _ in range(WRITES_PER_THREAD):
+                list(Post.objects.select_related('author', 'group')[:10])
+                Group.objects.get(pk=group.pk)
+
+        started = time.perf_counter()
+        errors = run_threads(
+            *[lambda user=user: create_posts(user) for user in users],
+            *[lambda user=user: log_in(user) for user in users],
+            *[read_feeds] * READERS,
+        )
+        rate = THREADS * WRITES_PER_THREAD * 3 / (
+            time.perf_counter() - started
+        )
+        self.assertEqual(errors, [])
+        self.assertGreaterEqual(rate, MIN_RATE)
+
+        def check():
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.assertEqual(cursor.fetchone()[0], 'wal')
+            self.assertEqual(Post.objects.count(),
+                             THREADS * WRITES_PER_THREAD)
+            self.assertEqual(Session.objects.count(),
+                             THREADS * WRITES_PER_THREAD)
+            group.refresh_from_db()
+            self.assertEqual(group.posts_count, THREADS * WRITES_PER_THREAD)
+            self.assertEqual(
+                [AuthorStats.count_for(user.pk) for user in users],
+                [WRITES_PER_THREAD] * THREADS
+            )
+
+        self.assertEqual(run_threads(check), [])
+
+
+class SerializedViewWritesTest(TransactionTestCase):
+    @override_settings(SERIALIZE_WRITES=True)
+    def test_post_create_and_edit_go_through_writer(self):
+        user = User.objects.create_user(username='auth')
+        self.client.force_login(user)
+        self.client.post(reverse('posts:post_create'), {'text': 'Новый'})
+        post = Post.objects.get()
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            {'text': 'Исправленный'}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Исправленный')
+        self.assertEqual(post.author, user)
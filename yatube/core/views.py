@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare
+
+from . import metrics as request_metrics
+
+
+def can_read_metrics(request):
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and constant_time_compare(header, f'Bearer {token}'):
+        return True
+    return request.user.is_staff
+
+
+def metrics(request):
+    if not can_read_metrics(request):
+        return JsonResponse({'detail': 'Доступ запрещён'}, status=403)
+    return JsonResponse({
+        'sample_rate': settings.METRICS_SAMPLE_RATE,
+        'views': request_metrics.snapshot(),
+    }, json_dumps_params={'ensure_ascii': False})
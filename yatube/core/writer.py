@@ -0,0 +1,53 @@
+"""Единственный поток записи в базу.
+
+SQLite пускает одного писателя за раз. Транзакция Django начинается как
+читающая (BEGIN DEFERRED) и становится пишущей только на первом INSERT;
+если другой поток успел записать раньше, SQLite сразу отвечает
+"database is locked", не дожидаясь busy timeout. Когда все записи
+процесса выполняет один поток, писатели процесса друг с другом не
+сталкиваются, а между процессами остаётся busy timeout.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_executor_lock = threading.Lock()
+_local = threading.local()
+
+
+def is_enabled():
+    return settings.SERIALIZE_WRITES
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1,
+                                           thread_name_prefix='db-writer')
+        return _executor
+
+
+def _call(func, args, kwargs):
+    _local.is_writer = True
+    # Как вокруг запроса: соединение после ошибки или старше CONN_MAX_AGE
+    # закрывается, и следующая запись откроет новое.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def run(func, *args, **kwargs):
+    """Выполняет func в потоке записи и возвращает её результат.
+
+    Исключения пробрасываются вызывающему. Без SERIALIZE_WRITES, а также
+    из самого потока записи func выполняется сразу.
+    """
+    if not is_enabled() or getattr(_local, 'is_writer', False):
+        return func(*args, **kwargs)
+    return get_executor().submit(_call, func, args, kwargs).result()
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Group, Post
+from . import search
+from .models import Group, OutboxEvent, Post
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,12 +11,35 @@ class PostAdmin(admin.ModelAdmin):
     list_editable = ('group',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        match = search.fts_query(search_term)
+        if not (search.is_available() and match):
+            return super().get_search_results(request, queryset,
+                                              search_term)
+        # Не pk__in=RawSQL(...): RawSQL добавляет свои скобки, и SQLite
+        # читает IN ((SELECT ...)) как список из одного значения.
+        queryset = queryset.extra(
+            where=[f'{Post._meta.db_table}.id IN ({search.MATCH_SQL})'],
+            params=[match]
+        )
+        return queryset, False
+
 
 admin.site.register(Post, PostAdmin)
 
 
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ('title', 'slug', 'description')
+    list_display = ('title', 'slug', 'description', 'posts_count')
 
 
 admin.site.register(Group, GroupAdmin)
+
+
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'kind', 'created', 'attempts', 'processed_at',
+                    'last_error')
+    list_filter = ('kind', 'processed_at')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(OutboxEvent, OutboxEventAdmin)
@@ -0,0 +1,351 @@
+"""Нагрузочные замеры представлений posts на сгенерированных данных.
+
+Используется командой benchmark_views; данные пишутся в текущую базу,
+поэтому команда запускает замеры на отдельной тестовой базе.
+"""
+import gc
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.servers.basehttp import (ThreadedWSGIServer,
+                                          WSGIRequestHandler)
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from core.template_backends import production_templates
+
+from .models import Group, Post
+from .pagination import CountedPaginator
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+PERCENTILES = (50, 90, 99)
+RENDER_SIZES = (10, 100, 1000)
+
+
+def seed_data(users, groups, posts, seed=0):
+    """Создаёт users пользователей, groups групп и posts постов."""
+    random.seed(seed)
+    mixer.faker.seed_instance(seed)
+    authors = mixer.cycle(users).blend(
+        User,
+        username=mixer.sequence('bench_user_{0}'),
+        first_name=mixer.FAKE,
+        last_name=mixer.FAKE,
+    )
+    all_groups = mixer.cycle(groups).blend(
+        Group,
+        slug=mixer.sequence('bench-group-{0}'),
+        title=mixer.FAKE,
+        description=mixer.FAKE,
+    )
+    choices = all_groups + [None]
+    for start in range(0, posts, BATCH_SIZE):
+        size = min(BATCH_SIZE, posts - start)
+        Post.objects.bulk_create(
+            Post(text=mixer.faker.paragraph(nb_sentences=5),
+                 author=random.choice(authors),
+                 group=random.choice(choices))
+            for _ in range(size)
+        )
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = max(0, round(percent / 100 * len(values)) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+def measure(request, repeat):
+    """Замеряет request() repeat раз: задержки, запросы к БД и память."""
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        request()
+        latencies.append((time.perf_counter() - started) * 1000)
+    # Журнал запросов ограничен по длине: если он полон, разница длин до
+    # и после замера будет нулевой.
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        response = request()
+    # Следующий запрос очистит журнал (сигнал request_started).
+    query_count = len(queries)
+    gc.collect()
+    tracemalloc.start()
+    request()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        'status': response.status_code,
+        'latency_ms': {
+            'min': round(min(latencies), 3),
+            'mean': round(statistics.mean(latencies), 3),
+            'max': round(max(latencies), 3),
+        },
+        'queries': query_count,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+    for percent in PERCENTILES:
+        result['latency_ms'][f'p{percent}'] = round(
+            percentile(latencies, percent), 3
+        )
+    return result
+
+
+def scenarios(author, group, post, pages):
+    """Запросы к представлениям: {имя: функция(client, author_client)}."""
+    index = reverse('posts:index')
+    edit_url = reverse('posts:post_edit', kwargs={'post_id': post.pk})
+    return {
+        'index': lambda guest, user: guest.get(index),
+        'index_last_page': lambda guest, user: guest.get(
+            index, {'page': pages}
+        ),
+        'group_posts': lambda guest, user: guest.get(
+            reverse('posts:group_list', kwargs={'slug': group.slug})
+        ),
+        'profile': lambda guest, user: guest.get(
+            reverse('posts:profile', kwargs={'username': author.username})
+        ),
+        'post_detail': lambda guest, user: guest.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        ),
+        'post_create': lambda guest, user: user.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост из бенчмарка', 'group': group.pk}
+        ),
+        'post_edit': lambda guest, user: user.post(
+            edit_url, {'text': 'Правка из бенчмарка', 'group': group.pk}
+        ),
+    }
+
+
+def read_paths(author, group, post):
+    """Страницы только для чтения, которые сравнивает throughput."""
+    return {
+        'index': reverse('posts:index'),
+        'group_posts': reverse('posts:group_list',
+                               kwargs={'slug': group.slug}),
+        'profile': reverse('posts:profile',
+                           kwargs={'username': author.username}),
+        'post_detail': reverse('posts:post_detail',
+                               kwargs={'post_id': post.pk}),
+    }
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def throughput(path, clients, requests):
+    """Запросов в секунду к path на локальном многопоточном WSGI-сервере
+    при clients одновременных клиентах."""
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+    server.set_app(get_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f'http://127.0.0.1:{server.server_port}{path}'
+
+    def fetch(_):
+        try:
+            with urlopen(url) as response:
+                response.read()
+                return response.status
+        except HTTPError as error:
+            return error.code
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            statuses = list(pool.map(fetch, range(requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.shutdown()
+        server.server_close()
+    return {
+        'requests': requests,
+        'errors': sum(status != 200 for status in statuses),
+        'rps': round(requests / elapsed, 1),
+    }
+
+
+def compare_throughput(paths, clients, requests, workers):
+    """Пропускная способность страниц с последовательными запросами
+    и с CONCURRENT_QUERIES=workers."""
+    results = {}
+    for name, path in paths.items():
+        results[name] = {}
+        for mode, size in (('sequential', 0), ('parallel', workers)):
+            with override_settings(
+                CONCURRENT_QUERIES=size,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, '127.0.0.1'],
+            ):
+                cache.clear()
+                results[name][mode] = throughput(path, clients, requests)
+    return results
+
+
+def run_benchmarks(users, groups, posts, repeat, seed=0, only=None,
+                   clients=0, requests=200, workers=4):
+    """Заполняет базу и замеряет каждое представление.
+
+    Если clients больше нуля, дополнительно сравнивает пропускную
+    способность страниц чтения при clients одновременных клиентах.
+    Возвращает словарь, готовый к сохранению в JSON.
+    """
+    seed_data(users, groups, posts, seed=seed)
+    cache.clear()
+    author = User.objects.annotate(total=Count('posts')).order_by(
+        '-total'
+    ).first()
+    group = Group.objects.order_by('-posts_count').first()
+    post = Post.objects.filter(author=author).first()
+    pages = max(1, -(-posts // settings.COUNT_POSTS))
+    guest, user = Client(), Client()
+    user.force_login(author)
+    results = {}
+    for name, request in scenarios(author, group, post, pages).items():
+        if only and name not in only:
+            continue
+        results[name] = measure(lambda: request(guest, user), repeat)
+    report = {
+        'params': {
+            'users': users,
+            'groups': groups,
+            'posts': posts,
+            'repeat': repeat,
+            'seed': seed,
+            'per_page': settings.COUNT_POSTS,
+        },
+        'views': results,
+    }
+    if clients:
+        paths = read_paths(author, group, post)
+        if only:
+            paths = {name: path for name, path in paths.items()
+                     if name in only}
+        report['params'].update(clients=clients, requests=requests,
+                                workers=workers)
+        report['throughput'] = compare_throughput(paths, clients, requests,
+                                                  workers)
+    return report
+
+
+def render_contexts(posts, size):
+    """Контексты шаблонов лент со страницей из size постов."""
+    post = posts[0]
+    page_obj = CountedPaginator(posts[:size], size).page(1)
+    return {
+        'posts/index.html': {'page_obj': page_obj},
+        'posts/group_list.html': {'group': post.group, 'page_obj': page_obj},
+        'posts/profile.html': {'author': post.author,
+                               'posts_count': len(posts),
+                               'page_obj': page_obj},
+    }
+
+
+def time_render(template_name, context, request, repeat, cold):
+    """Среднее время render_to_string, мс.
+
+    cold — перед каждой отрисовкой очищать кеш, чтобы все карточки
+    рисовались заново.
+    """
+    timings = []
+    for _ in range(repeat):
+        if cold:
+            cache.clear()
+        started = time.perf_counter()
+        render_to_string(template_name, context, request)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.mean(timings)
+
+
+def time_url_building(posts, repeat):
+    """Ссылки карточек страницы через reverse() и через links, мс.
+
+    На карточку приходятся ссылки на пост, группу и автора.
+    """
+    def with_reverse():
+        for post in posts:
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+            reverse('posts:group_list', kwargs={'slug': post.group.slug})
+            reverse('posts:profile',
+                    kwargs={'username': post.author.username})
+
+    def with_links():
+        for post in posts:
+            post.get_absolute_url()
+            post.group.get_absolute_url()
+            post.author.get_absolute_url()
+
+    results = {}
+    for name, build in (('reverse_ms', with_reverse),
+                        ('links_ms', with_links)):
+        build()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            build()
+        results[name] = round(
+            (time.perf_counter() - started) * 1000 / repeat, 4
+        )
+    results['saved_per_card_ms'] = round(
+        (results['reverse_ms'] - results['links_ms']) / len(posts), 5
+    )
+    return results
+
+
+def run_render_benchmarks(sizes=RENDER_SIZES, repeat=5, seed=0):
+    """Время отрисовки index, group_list и profile при разных размерах
+    страницы в профилях шаблонов development и production.
+
+    Все посты принадлежат одному автору и одной группе, поэтому у всех
+    трёх шаблонов одинаковые страницы.
+    """
+    seed_data(users=1, groups=1, posts=max(sizes), seed=seed)
+    Post.objects.update(group=Group.objects.get())
+    posts = list(Post.objects.feed())
+    request = RequestFactory().get('/')
+    request.user = posts[0].author
+    profiles = {
+        'development': settings.TEMPLATES,
+        'production': production_templates(settings.TEMPLATES),
+    }
+    results = {}
+    for profile, templates in profiles.items():
+        results[profile] = {}
+        with override_settings(TEMPLATES=templates):
+            for size in sizes:
+                for name, context in render_contexts(posts, size).items():
+                    # Первая отрисовка загружает шаблоны; её не считаем.
+                    render_to_string(name, context, request)
+                    cold = time_render(name, context, request, repeat, True)
+                    warm = time_render(name, context, request, repeat, False)
+                    results[profile].setdefault(name, {})[size] = {
+                        'cold_ms': round(cold, 3),
+                        'warm_ms': round(warm, 3),
+                        'per_card_ms': round(cold / size, 4),
+                    }
+    urls = {size: time_url_building(posts[:size], repeat * 10)
+            for size in sizes}
+    return {
+        'params': {'sizes': list(sizes), 'repeat': repeat, 'seed': seed},
+        'templates': results,
+        'urls': urls,
+    }
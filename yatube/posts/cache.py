@@ -0,0 +1,281 @@
+import hashlib
+import threading
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from core.routers import primary, replicas_allowed
+
+CARD_VERSION_KEY = 'post_card_version:{}'
+CARD_KEY = 'post_card:{}:{}:{}'
+
+GENERATION_KEY = 'feed_generation:{}'
+PAGE_KEY = 'feed_page:{}:{}'
+PAGE_LOCK_KEY = 'feed_page_lock:{}'
+# Поколение, общее для всех страниц: его сбрасывают редкие события,
+# меняющие сразу много страниц, например переименование группы.
+ALL_PAGES = 'all'
+PAGE_PARAMS = ('page', 'after', 'before')
+
+SYNDICATION_KEY = 'syndication:{}:{}:{}'
+
+TIMELINE_KEY = 'timeline'
+TIMELINE_LOCK_KEY = 'timeline_lock'
+
+_stats_lock = threading.Lock()
+_card_stats = {'hits': 0, 'misses': 0}
+
+
+def card_cache_stats():
+    """Счётчики попаданий и промахов кеша карточек в этом процессе."""
+    with _stats_lock:
+        return dict(_card_stats)
+
+
+def reset_card_cache_stats():
+    with _stats_lock:
+        _card_stats.update(hits=0, misses=0)
+
+
+def _count(hits, misses):
+    with _stats_lock:
+        _card_stats['hits'] += hits
+        _card_stats['misses'] += misses
+
+
+def after_commit(func, *args):
+    """Вызывает func(*args), когда закоммитится текущая транзакция.
+
+    Так сбрасывается любой кеш, производный от строк базы: сброс до
+    коммита дал бы параллельному запросу собрать страницу по старым
+    строкам уже под новым поколением, а после отката — сбросил бы кеш
+    впустую. Вне транзакции func вызывается сразу.
+    """
+    transaction.on_commit(lambda: func(*args))
+
+
+def invalidate_post_card(post_id):
+    """Новая версия поста: старые фрагменты больше не будут прочитаны."""
+    cache.set(CARD_VERSION_KEY.format(post_id), uuid.uuid4().hex, None)
+
+
+def get_card_versions(post_ids):
+    keys = {CARD_VERSION_KEY.format(post_id): post_id
+            for post_id in post_ids}
+    found = cache.get_many(keys)
+    versions = {keys[key]: version for key, version in found.items()}
+    # Версия могла быть вытеснена из кеша: выдаём новую, а не «нулевую»,
+    # иначе можно прочитать фрагмент, сохранённый до вытеснения.
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(
+            {keys[key]: version for key, version in missing.items()}
+        )
+    return versions
+
+
+def card_key(post, version, show_group):
+    """Ключ фрагмента.
+
+    Кроме версии поста в ключ входит всё, что карточка берёт у связанных
+    объектов: смена имени автора или слага группы даёт новый ключ без
+    отдельной инвалидации, а дата публикации защищает от повторно
+    выданного pk.
+    """
+    parts = [
+        post.pub_date.isoformat(),
+        post.author.get_full_name(),
+        post.group.slug if show_group else '',
+    ]
+    digest = hashlib.md5('\0'.join(parts).encode()).hexdigest()
+    return CARD_KEY.format(post.pk, version, digest)
+
+
+def render_cards(posts, render, show_group):
+    """Возвращает HTML карточек posts, беря готовые из кеша.
+
+    render(post) отрисовывает одну карточку при промахе.
+    """
+    posts = list(posts)
+    versions = get_card_versions(post.pk for post in posts)
+    keys = [
+        card_key(post, versions[post.pk], show_group and post.group_id)
+        for post in posts
+    ]
+    found = cache.get_many(keys)
+    rendered = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        if key not in found:
+            rendered[key] = render(post)
+        cards.append(found.get(key) or rendered[key])
+    # Посты с реплики могут быть старше версии: такие карточки не храним.
+    if rendered and not replicas_allowed():
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+    _count(len(posts) - len(rendered), len(rendered))
+    return cards
+
+
+def index_scope():
+    return 'index'
+
+
+# slug и username приходят из адреса и могут содержать символы,
+# недопустимые в ключах memcached, поэтому в имени ленты — их хеш.
+def group_scope(slug):
+    return f'group:{hashlib.md5(slug.encode()).hexdigest()}'
+
+
+def profile_scope(username):
+    return f'profile:{hashlib.md5(username.encode()).hexdigest()}'
+
+
+def groups_scope():
+    return 'groups'
+
+
+def _new_generation():
+    # Время смены поколения — Last-Modified для условных запросов.
+    return f'{time.time():.6f}-{uuid.uuid4().hex}'
+
+
+def bump_generations(*scopes):
+    """Сбрасывает кеш страниц перечисленных лент."""
+    cache.set_many(
+        {GENERATION_KEY.format(scope): _new_generation() for scope in scopes},
+        None
+    )
+
+
+def generation_time(generation):
+    """Когда менялась лента с поколением generation, timestamp.
+
+    Если поколение без времени, ленту считаем изменённой только что.
+    """
+    times = []
+    for part in generation.split(':'):
+        try:
+            times.append(float(part.split('-')[0]))
+        except ValueError:
+            return time.time()
+    return max(times)
+
+
+def get_generation(scope):
+    keys = [GENERATION_KEY.format(ALL_PAGES), GENERATION_KEY.format(scope)]
+    found = cache.get_many(keys)
+    missing = {key: _new_generation() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return ':'.join(found[key] for key in keys)
+
+
+def drop_timeline():
+    """Сбрасывает ленту последних постов: её соберёт следующий читатель."""
+    cache.delete(TIMELINE_KEY)
+
+
+def page_params(request):
+    return '&'.join(
+        f'{name}={request.GET.get(name, "")}' for name in PAGE_PARAMS
+    )
+
+
+def _page_key(scope, request):
+    digest = hashlib.md5(page_params(request).encode()).hexdigest()
+    return PAGE_KEY.format(scope, digest)
+
+
+def _cached_response(entry):
+    response = HttpResponse(entry['content'],
+                            content_type=entry['content_type'])
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def cache_anonymous_page(scope):
+    """Кеширует страницу ленты для анонимных GET-запросов.
+
+    scope(**view_kwargs) называет ленту; запись о посте сбрасывает только
+    поколения затронутых лент (см. bump_generations). Пока один запрос
+    перестраивает устаревшую страницу, остальные в течение
+    FEED_CACHE_STALE_TIMEOUT получают её прежнюю версию. Страница для кеша
+    читается из основной базы, а не с реплики.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            timeout = settings.FEED_CACHE_TIMEOUT
+            if (not timeout or request.method != 'GET'
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            name = scope(**kwargs)
+            key = _page_key(name, request)
+            lock_key = PAGE_LOCK_KEY.format(key)
+            generation = get_generation(name)
+            entry = cache.get(key)
+            stale_timeout = settings.FEED_CACHE_STALE_TIMEOUT
+            locked = False
+            if entry is not None:
+                if (entry['generation'] == generation
+                        and entry['expires'] > time.time()):
+                    return _cached_response(entry)
+                if stale_timeout:
+                    locked = cache.add(lock_key, 1, stale_timeout)
+                    if not locked:
+                        return _cached_response(entry)
+            with primary():
+                response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(key, {
+                    'generation': generation,
+                    'expires': time.time() + timeout,
+                    'content': response.content,
+                    'content_type': response['Content-Type'],
+                }, timeout + stale_timeout)
+                patch_vary_headers(response, ('Cookie',))
+            if locked:
+                cache.delete(lock_key)
+            return response
+        return wrapper
+    return decorator
+
+
+def cache_syndication(scope, kind):
+    """Кеширует RSS/Atom-ленту kind до смены поколения scope.
+
+    Лента одинакова для всех, поэтому в отличие от cache_anonymous_page
+    кешируется и для вошедших пользователей. Абсолютные ссылки в ней
+    строятся по схеме и хосту запроса, поэтому они входят в ключ.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            name = scope(**kwargs)
+            variant = '\0'.join((request.scheme, request.get_host(),
+                                 get_generation(name)))
+            key = SYNDICATION_KEY.format(
+                kind, name, hashlib.md5(variant.encode()).hexdigest()
+            )
+            entry = cache.get(key)
+            if entry is not None:
+                return HttpResponse(entry['content'],
+                                    content_type=entry['content_type'])
+            with primary():
+                response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, {
+                    'content': response.content,
+                    'content_type': response['Content-Type'],
+                }, settings.SYNDICATION_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,91 @@
+"""ETag и Last-Modified для страниц постов.
+
+Валидаторы считаются до представления, поэтому на If-None-Match и
+If-Modified-Since с неизменившейся страницей отвечаем 304 без запросов
+за постами и без шаблонов.
+
+Страницы лент описывает их поколение (см. cache.bump_generations): оно
+меняется при любой записи, видимой в ленте, включая удаление поста и
+переименование автора или группы, которых не видно по датам самих
+постов. Страница поста — это updated_at поста плюс поколение профиля
+автора, куда попадают его число постов и имя.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import condition
+
+from .cache import generation_time, get_generation, page_params, profile_scope
+from .models import Post
+
+
+def _etag(*parts):
+    return hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _viewer(request):
+    # Шапка страницы зависит от того, кто её смотрит.
+    return request.user.pk or 0
+
+
+def _vary_on_cookie(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    return wrapper
+
+
+def conditional_feed(scope):
+    """Условные GET для ленты, названной scope(**view_kwargs)."""
+    def etag(request, **kwargs):
+        return _etag(get_generation(scope(**kwargs)), page_params(request),
+                     _viewer(request))
+
+    def last_modified(request, **kwargs):
+        timestamp = generation_time(get_generation(scope(**kwargs)))
+        return datetime.fromtimestamp(timestamp, timezone.utc)
+
+    def decorator(view):
+        return _vary_on_cookie(condition(etag, last_modified)(view))
+    return decorator
+
+
+def _post_state(request, post_id):
+    """updated_at поста и поколение профиля автора, один раз на запрос."""
+    if getattr(request, '_post_state', None) is None:
+        row = Post.objects.filter(pk=post_id).values_list(
+            'updated_at', 'author__username'
+        ).first()
+        if row is not None:
+            updated_at, username = row
+            row = updated_at, get_generation(profile_scope(username))
+        request._post_state = (row,)
+    return request._post_state[0]
+
+
+def _post_etag(request, post_id):
+    state = _post_state(request, post_id)
+    if state is None:
+        return None
+    updated_at, generation = state
+    return _etag(updated_at.isoformat(), generation, _viewer(request))
+
+
+def _post_last_modified(request, post_id):
+    state = _post_state(request, post_id)
+    if state is None:
+        return None
+    updated_at, generation = state
+    timestamp = max(updated_at.timestamp(), generation_time(generation))
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def conditional_post(view):
+    """Условные GET для страницы поста."""
+    return _vary_on_cookie(
+        condition(_post_etag, _post_last_modified)(view)
+    )
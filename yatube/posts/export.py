@@ -0,0 +1,126 @@
+"""Потоковая выгрузка постов для аналитики и резервных копий.
+
+Строки читаются keyset-пачками по (pub_date, id) и сразу отдаются —
+сжатыми, если получатель принимает gzip, — поэтому память не зависит
+от размера таблицы. Формат записей совпадает с тем, что принимает
+команда import_posts.
+"""
+import csv
+import io
+import json
+import zlib
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Post
+
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+FIELDS = ('id', 'text', 'pub_date', 'author', 'group')
+BATCH_SIZE = 1000
+
+
+def parse_since(value):
+    """Дата для since из строки ISO 8601; None, если её не разобрать."""
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        return None
+    if since is not None and timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def iter_rows(since=None, after_id=None, batch_size=BATCH_SIZE):
+    """Посты по возрастанию (pub_date, id), начиная после ключа.
+
+    since без after_id выгружает посты, опубликованные строго позже since.
+    """
+    queryset = Post.objects.order_by('pub_date', 'id').values_list(
+        'id', 'text', 'pub_date', 'author__username', 'group__slug'
+    )
+    key = None if since is None else (since, after_id)
+    while True:
+        batch = queryset
+        if key is not None:
+            pub_date, pk = key
+            if pk is None:
+                batch = batch.filter(pub_date__gt=pub_date)
+            else:
+                batch = batch.filter(
+                    Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk)
+                )
+        rows = list(batch[:batch_size])
+        for row in rows:
+            yield dict(zip(FIELDS, row))
+        if len(rows) < batch_size:
+            return
+        key = (rows[-1][2], rows[-1][0])
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        row['pub_date'] = row['pub_date'].isoformat()
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, FIELDS)
+    writer.writeheader()
+    for row in rows:
+        row['pub_date'] = row['pub_date'].isoformat()
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def gzip_chunks(lines, chunk_size=64 * 1024):
+    """Сжимает строки в gzip по мере поступления.
+
+    Сжатые байты отдаются кусками не меньше chunk_size, чтобы не слать
+    по крошечному пакету на каждую строку.
+    """
+    compressor = zlib.compressobj(wbits=31)
+    pending = []
+    size = 0
+    for line in lines:
+        data = compressor.compress(line.encode())
+        if data:
+            pending.append(data)
+            size += len(data)
+        if size >= chunk_size:
+            yield b''.join(pending)
+            pending, size = [], 0
+    pending.append(compressor.flush())
+    yield b''.join(pending)
+
+
+def text_chunks(lines, chunk_size=64 * 1024):
+    """Строки в байтах, собранные в куски не меньше chunk_size."""
+    pending = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        pending.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b''.join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b''.join(pending)
+
+
+def export(file_format='jsonl', since=None, after_id=None,
+           batch_size=BATCH_SIZE, compress=True):
+    """Поток выгрузки в формате file_format, сжатый gzip при compress."""
+    serialize = csv_lines if file_format == 'csv' else jsonl_lines
+    rows = iter_rows(since=since, after_id=after_id, batch_size=batch_size)
+    chunks = gzip_chunks if compress else text_chunks
+    return chunks(serialize(rows))
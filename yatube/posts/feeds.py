@@ -0,0 +1,126 @@
+"""RSS и Atom для главной, групп и авторов.
+
+Записи читаются одним узким values()-запросом, готовый XML кешируется до
+смены поколения ленты (см. cache.bump_generations), а условные GET
+отвечают 304 вообще без обращения к базе.
+"""
+from django.contrib.syndication.views import Feed
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from core.routers import read_only
+
+from .cache import cache_syndication, group_scope, index_scope, profile_scope
+from . import links, lookups
+from .conditional import conditional_feed
+from .models import Post
+
+ITEMS = 20
+TITLE_LENGTH = 50
+
+ITEM_FIELDS = (
+    'id', 'excerpt', 'text_html', 'pub_date', 'updated_at',
+    'author__username', 'author__first_name', 'author__last_name',
+)
+
+
+class PostsFeed(Feed):
+    """Последние посты; наследники сужают выборку в filter_items."""
+
+    def filter_items(self, queryset, obj):
+        return queryset
+
+    def items(self, obj):
+        queryset = self.filter_items(Post.objects.all(), obj)
+        return list(queryset.values(*ITEM_FIELDS)[:ITEMS])
+
+    def item_title(self, item):
+        text = ' '.join(item['excerpt'].split())
+        if len(text) > TITLE_LENGTH:
+            return text[:TITLE_LENGTH - 1] + '…'
+        return text
+
+    def item_description(self, item):
+        return item['text_html']
+
+    def item_link(self, item):
+        return links.build('posts:post_detail', post_id=item['id'])
+
+    def item_pubdate(self, item):
+        return item['pub_date']
+
+    def item_updateddate(self, item):
+        return item['updated_at']
+
+    def item_author_name(self, item):
+        full_name = (f'{item["author__first_name"]} '
+                     f'{item["author__last_name"]}').strip()
+        return full_name or item['author__username']
+
+    def item_author_link(self, item):
+        return links.build('posts:profile',
+                           username=item['author__username'])
+
+
+class LatestPostsFeed(PostsFeed):
+    title = 'Yatube: последние посты'
+    description = 'Новые посты всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+
+class GroupPostsFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return lookups.get_group_or_404(slug)
+
+    def filter_items(self, queryset, group):
+        return queryset.filter(group=group)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return group.get_absolute_url()
+
+
+class AuthorPostsFeed(PostsFeed):
+    def get_object(self, request, username):
+        return lookups.get_author_or_404(username)
+
+    def filter_items(self, queryset, author):
+        return queryset.filter(author=author)
+
+    def title(self, author):
+        return f'Yatube: посты {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return self.title(author)
+
+    def link(self, author):
+        return author.get_absolute_url()
+
+
+def atom(feed_class):
+    """Atom-вариант ленты: описание становится подзаголовком."""
+    return type(f'Atom{feed_class.__name__}', (feed_class,), {
+        'feed_type': Atom1Feed,
+        'subtitle': feed_class.description,
+    })
+
+
+def syndication_view(feed_class, scope, kind):
+    view = cache_syndication(scope, kind)(feed_class())
+    return read_only(conditional_feed(scope)(view))
+
+
+index_rss = syndication_view(LatestPostsFeed, index_scope, 'rss')
+index_atom = syndication_view(atom(LatestPostsFeed), index_scope, 'atom')
+group_rss = syndication_view(GroupPostsFeed, group_scope, 'rss')
+group_atom = syndication_view(atom(GroupPostsFeed), group_scope, 'atom')
+profile_rss = syndication_view(AuthorPostsFeed, profile_scope, 'rss')
+profile_atom = syndication_view(atom(AuthorPostsFeed), profile_scope,
+                                'atom')
@@ -0,0 +1,147 @@
+"""Кеш поиска группы по slug и автора по username.
+
+Страницы group_posts и profile начинаются с этого поиска ещё до запроса
+постов. Найденное держится в общем кеше LOOKUP_CACHE_TIMEOUT секунд и
+в LRU процесса — LOOKUP_LOCAL_TIMEOUT секунд: сигналы сбрасывают записи
+в общем кеше и в своём процессе, а остальные процессы увидят изменение
+не позже чем через этот короткий срок. Отсутствие объекта помнит только
+LRU, тоже LOOKUP_LOCAL_TIMEOUT: повторы одного несуществующего адреса не
+доходят до базы, а выдуманные адреса не засоряют общий кеш — размер LRU
+ограничен. Создание объекта сбрасывает и эту запись.
+
+В ключ входит хеш slug или username: в адресе они могут содержать
+символы, недопустимые в ключах memcached.
+
+При LOOKUP_CACHE_TIMEOUT = 0 поиск всегда идёт в базу.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from core.routers import primary
+
+from .models import Group, User
+
+GROUP_KEY = 'lookup:group:{}'
+USER_KEY = 'lookup:user:{}'
+
+GROUP_FIELDS = ('title', 'slug', 'description', 'posts_count')
+USER_FIELDS = ('username', 'first_name', 'last_name')
+
+
+class LRUCache:
+    """Небольшой потокобезопасный LRU со временем жизни записей."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Возвращает (найдено, значение)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, timeout, size):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LRUCache()
+
+
+def is_enabled():
+    return settings.LOOKUP_CACHE_TIMEOUT > 0
+
+
+def _key(template, value):
+    return template.format(hashlib.md5(value.encode()).hexdigest())
+
+
+def _lookup(key, load):
+    found, value = local_cache.get(key)
+    if found:
+        return value
+    value = cache.get(key)
+    if value is None:
+        with primary():
+            value = load()
+        if value is not None:
+            cache.set(key, value, settings.LOOKUP_CACHE_TIMEOUT)
+    if settings.LOOKUP_LOCAL_TIMEOUT:
+        local_cache.set(key, value, settings.LOOKUP_LOCAL_TIMEOUT,
+                        settings.LOOKUP_LRU_SIZE)
+    return value
+
+
+def get_group_or_404(slug):
+    if not is_enabled():
+        return get_object_or_404(Group, slug=slug)
+    group = _lookup(
+        _key(GROUP_KEY, slug),
+        lambda: Group.objects.only(*GROUP_FIELDS).filter(slug=slug).first()
+    )
+    if group is None:
+        raise Http404('Группа не найдена')
+    return group
+
+
+def get_author_or_404(username):
+    if not is_enabled():
+        return get_object_or_404(User, username=username)
+    author = _lookup(
+        _key(USER_KEY, username),
+        lambda: User.objects.only(*USER_FIELDS).filter(
+            username=username
+        ).first()
+    )
+    if author is None:
+        raise Http404('Автор не найден')
+    return author
+
+
+def evict_groups(*slugs):
+    keys = [_key(GROUP_KEY, slug) for slug in slugs if slug]
+    local_cache.delete(*keys)
+    cache.delete_many(keys)
+
+
+def evict_users(*usernames):
+    keys = [_key(USER_KEY, username) for username in usernames
+            if username]
+    local_cache.delete(*keys)
+    cache.delete_many(keys)
+
+
+def evict_group_ids(group_ids):
+    """Сбрасывает группы по id: например, после смены их числа постов."""
+    if not is_enabled():
+        return
+    evict_groups(*Group.objects.filter(
+        pk__in=set(group_ids) - {None}
+    ).values_list('slug', flat=True))
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from posts.benchmark import RENDER_SIZES, run_render_benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время отрисовки шаблонов лент при разном числе '
+            'постов на странице: с кешем карточек и без, с обычными и '
+            'кеширующими загрузчиками шаблонов. Данные создаются в '
+            'отдельной тестовой базе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=list(RENDER_SIZES))
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default='benchmark_templates.json')
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment(debug=False)
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = run_render_benchmarks(
+                options['sizes'], options['repeat'], seed=options['seed']
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        for profile, templates in report['templates'].items():
+            for name, sizes in templates.items():
+                for size, result in sizes.items():
+                    self.stdout.write(
+                        f'{profile:12} {name:24} {size:5} '
+                        f'cold {result["cold_ms"]:9.2f} ms  '
+                        f'warm {result["warm_ms"]:9.2f} ms  '
+                        f'card {result["per_card_ms"]:7.4f} ms'
+                    )
+        for size, result in report['urls'].items():
+            self.stdout.write(
+                f'{"urls":12} {"reverse / links":24} {size:5} '
+                f'reverse {result["reverse_ms"]:9.3f} ms  '
+                f'links {result["links_ms"]:9.3f} ms  '
+                f'card {result["saved_per_card_ms"]:7.4f} ms'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {options["output"]}'
+        ))
@@ -0,0 +1,78 @@
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+from django.utils import timezone
+
+from posts.benchmark import run_benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержки, число запросов и пик памяти представлений '
+            'posts на сгенерированных данных и пишет результат в JSON. '
+            'Данные создаются в отдельной тестовой базе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=50,
+                            help='Сколько раз запрашивать каждую страницу.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--view', action='append', dest='views',
+                            help='Замерить только это представление; '
+                                 'можно указать несколько раз.')
+        parser.add_argument('--clients', type=int, default=0,
+                            help='Одновременных клиентов для замера '
+                                 'пропускной способности на локальном '
+                                 'сервере; 0 — не замерять.')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Запросов к каждой странице при замере '
+                                 'пропускной способности.')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='CONCURRENT_QUERIES для параллельного '
+                                 'режима.')
+        parser.add_argument('--output', default='benchmark.json')
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment(debug=False)
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = run_benchmarks(
+                options['users'], options['groups'], options['posts'],
+                options['repeat'], seed=options['seed'],
+                only=options['views'], clients=options['clients'],
+                requests=options['requests'], workers=options['workers'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        report['environment'] = {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        for name, result in report['views'].items():
+            latency = result['latency_ms']
+            self.stdout.write(
+                f'{name:16} p50 {latency["p50"]:8.2f} ms  '
+                f'p99 {latency["p99"]:8.2f} ms  '
+                f'queries {result["queries"]:3}  '
+                f'peak {result["peak_memory_kb"]:8.1f} KiB'
+            )
+        for name, modes in report.get('throughput', {}).items():
+            self.stdout.write(
+                f'{name:16} sequential {modes["sequential"]["rps"]:8.1f} '
+                f'rps  parallel {modes["parallel"]["rps"]:8.1f} rps'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {options["output"]}'
+        ))
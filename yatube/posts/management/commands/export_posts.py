@@ -0,0 +1,71 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты с username автора и slug группы в сжатый gzip '
+            'JSONL или CSV. Таблица читается keyset-пачками, память не '
+            'зависит от числа постов. --since и --after-id выгружают только '
+            'посты после указанного ключа (pub_date, id).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output',
+                            help='Файл .jsonl.gz или .csv.gz; - для stdout.')
+        parser.add_argument('--format', choices=export.FORMATS,
+                            help='По умолчанию — по расширению файла.')
+        parser.add_argument('--since',
+                            help='pub_date (ISO 8601) последнего '
+                                 'выгруженного поста.')
+        parser.add_argument('--after-id', type=int,
+                            help='id последнего выгруженного поста.')
+        parser.add_argument('--batch-size', type=int,
+                            default=export.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        output = options['output']
+        file_format = options['format'] or (
+            'csv' if '.csv' in output else 'jsonl'
+        )
+        since = None
+        if options['since']:
+            since = export.parse_since(options['since'])
+            if since is None:
+                raise CommandError(f'Неверная дата: {options["since"]}')
+        elif options['after_id'] is not None:
+            raise CommandError('--after-id используется вместе с --since')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным')
+        self.count = 0
+        self.last = None
+        rows = self.track(export.iter_rows(
+            since=since, after_id=options['after_id'],
+            batch_size=options['batch_size'],
+        ))
+        serialize = (export.csv_lines if file_format == 'csv'
+                     else export.jsonl_lines)
+        chunks = export.gzip_chunks(serialize(rows))
+        if output == '-':
+            self.write(sys.stdout.buffer, chunks)
+        else:
+            with open(output, 'wb') as target:
+                self.write(target, chunks)
+        message = f'Выгружено постов: {self.count}'
+        if self.last is not None:
+            pub_date, pk = self.last
+            message += (f'; следующая выгрузка: --since {pub_date} '
+                        f'--after-id {pk}')
+        self.stderr.write(message)
+
+    def track(self, rows):
+        for row in rows:
+            self.count += 1
+            self.last = (row['pub_date'].isoformat(), row['id'])
+            yield row
+
+    def write(self, target, chunks):
+        for chunk in chunks:
+            target.write(chunk)
+        target.flush()
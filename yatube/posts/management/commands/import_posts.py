@@ -0,0 +1,164 @@
+import csv
+import json
+import os
+import sys
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.models import Group, ImportProgress, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Массово импортирует посты из JSONL или CSV с полями text, '
+            'author (username), group (slug) и pub_date (ISO 8601). '
+            'Посты вставляются пачками с исходными датами, каждая пачка — '
+            'в своей транзакции вместе с прогрессом; после сбоя импорт '
+            'продолжается с первой несохранённой пачки. Когда импорт '
+            'завершён, прогресс удаляется.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .jsonl или .csv; - для stdin.')
+        parser.add_argument('--format', choices=('jsonl', 'csv'),
+                            help='По умолчанию — по расширению файла.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--create-missing', action='store_true',
+                            help='Создавать неизвестных авторов и группы.')
+        parser.add_argument('--state',
+                            help='Ключ прогресса в базе; по умолчанию '
+                                 'абсолютный путь файла.')
+        parser.add_argument('--restart', action='store_true',
+                            help='Игнорировать сохранённый прогресс.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным')
+        self.create_missing = options['create_missing']
+        self.authors = {}
+        self.groups = {}
+        state_key = options['state'] or (
+            None if path == '-' else os.path.abspath(path)
+        )
+        done = 0 if options['restart'] else self.load_state(state_key)
+        imported = skipped = 0
+        with self.open(path) as source:
+            records = islice(self.read(source, file_format), done, None)
+            while True:
+                batch = list(islice(records, options['batch_size']))
+                if not batch:
+                    break
+                # Прогресс пишется в той же транзакции, что и посты: после
+                # сбоя пачка либо сохранена и учтена, либо нет вовсе.
+                with transaction.atomic():
+                    posts, rejected = self.build_posts(batch)
+                    Post.objects.bulk_import(posts)
+                    self.save_state(state_key, done + len(batch))
+                done += len(batch)
+                imported += len(posts)
+                skipped += rejected
+        # Импорт завершён: следующий запуск, того же файла или нового,
+        # начнётся с начала, а не с конца этого.
+        if state_key:
+            ImportProgress.objects.filter(source=state_key).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано постов: {imported}, пропущено: {skipped}, '
+            f'обработано записей: {done}'
+        ))
+
+    def open(self, path):
+        if path == '-':
+            return open(sys.stdin.fileno(), encoding='utf-8', closefd=False)
+        try:
+            return open(path, encoding='utf-8', newline='')
+        except OSError as exc:
+            raise CommandError(f'Не удалось открыть {path}: {exc}')
+
+    def read(self, source, file_format):
+        if file_format == 'csv':
+            yield from csv.DictReader(source)
+            return
+        for number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                raise CommandError(f'Строка {number}: не JSON ({exc})')
+            if not isinstance(record, dict):
+                raise CommandError(f'Строка {number}: не объект JSON')
+            yield record
+
+    def load_state(self, state_key):
+        done = ImportProgress.objects.filter(
+            source=state_key
+        ).values_list('done', flat=True).first() if state_key else None
+        if not done:
+            return 0
+        self.stdout.write(f'Продолжаем с записи {done + 1}')
+        return done
+
+    def save_state(self, state_key, done):
+        if state_key:
+            ImportProgress.objects.update_or_create(
+                source=state_key, defaults={'done': done}
+            )
+
+    def resolve(self, cache, model, field, keys, defaults):
+        """Ищет объекты по keys одним запросом на пачку и кеширует id."""
+        missing = {key for key in keys if key and key not in cache}
+        if not missing:
+            return
+        found = model.objects.filter(
+            **{f'{field}__in': missing}
+        ).values_list(field, 'pk')
+        cache.update(found)
+        if self.create_missing:
+            for key in missing - set(cache):
+                cache[key] = model.objects.create(
+                    **{field: key}, **defaults(key)
+                ).pk
+
+    def build_posts(self, batch):
+        self.resolve(self.authors, User, 'username',
+                     {record.get('author') for record in batch},
+                     lambda username: {'password': '!'})
+        self.resolve(self.groups, Group, 'slug',
+                     {record.get('group') for record in batch},
+                     lambda slug: {'title': slug})
+        posts, rejected = [], 0
+        for record in batch:
+            author_id = self.authors.get(record.get('author'))
+            group = record.get('group')
+            group_id = self.groups.get(group)
+            pub_date = self.parse_date(record.get('pub_date', ''))
+            if (not record.get('text') or author_id is None
+                    or (group and group_id is None) or pub_date is None):
+                rejected += 1
+                continue
+            posts.append(Post(text=record['text'], author_id=author_id,
+                              group_id=group_id, pub_date=pub_date))
+        return posts, rejected
+
+    def parse_date(self, value):
+        if value == '':
+            return timezone.now()
+        # Число или null в JSON — ошибка в записи, а не дата.
+        if not isinstance(value, str):
+            return None
+        try:
+            pub_date = parse_datetime(value)
+        except ValueError:
+            return None
+        if pub_date is not None and timezone.is_naive(pub_date):
+            pub_date = timezone.make_aware(pub_date)
+        return pub_date
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export, outbox
+from posts.models import OutboxEvent
+
+
+class Command(BaseCommand):
+    help = ('Обрабатывает события outbox, которые не обработал пул: после '
+            'перезапуска или исчерпанных повторов. С --replay сначала '
+            'возвращает в очередь и уже обработанные события, например '
+            'после очистки кеша. Удаляет обработанные события старше '
+            'OUTBOX_RETENTION_DAYS дней; запускайте по расписанию.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replay', action='store_true',
+                            help='Повторить и обработанные события.')
+        parser.add_argument('--since',
+                            help='Только события, созданные после этой '
+                                 'даты (ISO 8601).')
+        parser.add_argument('ids', nargs='*', type=int,
+                            help='Только события с этими id.')
+
+    def handle(self, *args, **options):
+        events = OutboxEvent.objects.all()
+        if options['since']:
+            since = export.parse_since(options['since'])
+            if since is None:
+                raise CommandError(f'Неверная дата: {options["since"]}')
+            events = events.filter(created__gt=since)
+        if options['ids']:
+            events = events.filter(pk__in=options['ids'])
+        if options['replay']:
+            replayed = outbox.replay(events)
+            self.stdout.write(f'Возвращено в очередь: {replayed}')
+        done, failed = outbox.drain(
+            events.filter(pk__in=outbox.pending().values('pk'))
+        )
+        pruned = outbox.prune()
+        message = (f'Обработано событий: {done}, с ошибкой: {failed}, '
+                   f'удалено старых: {pruned}')
+        if failed:
+            raise CommandError(message)
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает ленту последних постов в кеше. С --check только '
+            'сравнивает её с базой и завершается ошибкой при расхождении.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Проверить ленту, не пересобирая.')
+
+    def handle(self, *args, **options):
+        if not timeline.is_enabled():
+            raise CommandError('Лента выключена: TIMELINE_SIZE = 0')
+        if options['check']:
+            problems = timeline.check()
+            if problems:
+                raise CommandError(
+                    'Лента расходится с базой: ' + '; '.join(problems)
+                )
+            self.stdout.write(self.style.SUCCESS('Лента совпадает с базой'))
+            return
+        entry = timeline.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'В ленте постов: {len(entry["posts"])} из {entry["count"]}'
+        ))
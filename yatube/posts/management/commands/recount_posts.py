@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import AuthorStats, Group, Post, refresh_last_activity
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает с нуля счётчики постов авторов и групп и дату '
+            'последнего поста групп.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            per_group = Post.objects.filter(group=OuterRef('pk')).order_by(
+            ).values('group').annotate(total=Count('pk')).values('total')
+            groups = Group.objects.update(posts_count=Coalesce(
+                Subquery(per_group, output_field=IntegerField()), 0
+            ))
+            refresh_last_activity()
+            AuthorStats.objects.all().delete()
+            per_author = Post.objects.order_by().values('author').annotate(
+                total=Count('pk')
+            )
+            authors = AuthorStats.objects.bulk_create(
+                AuthorStats(author_id=row['author'], posts_count=row['total'])
+                for row in per_author
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано групп: {groups}, авторов: {len(authors)}'
+        ))
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:00
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import F
+
+post_search = import_module('posts.migrations.0005_post_search')
+
+# В SQLite AddField пересоздаёт posts_post, и триггеры индекса пропадают
+# вместе со старой таблицей. Возвращаем их после перестройки в обе стороны.
+RESTORE_SEARCH = post_search.run_on_sqlite(post_search.CREATE_SQL[1:])
+
+
+def copy_pub_date(apps, schema_editor):
+    # Старые посты не редактировались позже публикации, насколько мы знаем.
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(updated_at=F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, RESTORE_SEARCH),
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(RESTORE_SEARCH, migrations.RunPython.noop),
+        migrations.RunPython(copy_pub_date, migrations.RunPython.noop),
+    ]
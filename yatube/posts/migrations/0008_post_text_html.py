@@ -0,0 +1,62 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:15
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+# Копия posts.models.EXCERPT_LENGTH на момент миграции.
+EXCERPT_LENGTH = 300
+BATCH_SIZE = 1000
+
+post_search = import_module('posts.migrations.0005_post_search')
+
+# Как и в 0006: AddField пересоздаёт posts_post вместе с триггерами индекса.
+RESTORE_SEARCH = post_search.run_on_sqlite(post_search.CREATE_SQL[1:])
+
+
+def render_texts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.only('text').order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        for post in batch:
+            post.text_html = linebreaks(post.text, autoescape=True)
+            post.excerpt = Truncator(post.text).chars(EXCERPT_LENGTH)
+            post.is_truncated = post.excerpt != post.text
+        Post.objects.bulk_update(
+            batch, ('text_html', 'excerpt', 'is_truncated')
+        )
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_outbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, RESTORE_SEARCH),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(default='', editable=False, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_truncated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст обрезан'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(default='', editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(RESTORE_SEARCH, migrations.RunPython.noop),
+        migrations.RunPython(render_texts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:17
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_last_activity(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    newest = Post.objects.filter(group=OuterRef('pk')).order_by(
+        '-pub_date'
+    ).values('pub_date')[:1]
+    Group.objects.update(last_activity=Subquery(newest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_activity',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последний пост'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['last_activity'], name='group_last_activity_idx'),
+        ),
+        migrations.RunPython(fill_last_activity, migrations.RunPython.noop),
+    ]
@@ -1,23 +1,201 @@
-from django.db import models
+from collections import Counter
+
+from django.db import connections, models, transaction
+from django.db.models import F, OuterRef, Subquery
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+from . import links
+from .cache import ALL_PAGES, after_commit, bump_generations, drop_timeline
 
 User = get_user_model()
 
+# Сколько символов текста поста показывает карточка в лентах.
+EXCERPT_LENGTH = 300
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число постов'
+    )
+    last_activity = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Последний пост'
+    )
+
+    class Meta:
+        # Справочник групп упорядочен по активности; rowid в конце
+        # индекса даёт тай-брейкер -pk.
+        indexes = (
+            models.Index(fields=('last_activity',),
+                         name='group_last_activity_idx'),
+        )
 
     def __str__(self):
         return self.title
 
+    def get_absolute_url(self):
+        return links.build('posts:group_list', slug=self.slug)
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счётчики автора: User — модель django.contrib.auth,
+    поэтому храним их в отдельной таблице."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов'
+    )
+
+    def __str__(self):
+        return f'{self.author_id}: {self.posts_count}'
+
+    @classmethod
+    def count_for(cls, author_id):
+        count = cls.objects.filter(author_id=author_id).values_list(
+            'posts_count', flat=True
+        ).first()
+        if count is None:
+            count = cls.create_for(author_id).posts_count
+        return count
+
+    @classmethod
+    def create_for(cls, author_id):
+        """Создаёт недостающую строку, посчитав посты автора один раз."""
+        stats, _ = cls.objects.get_or_create(
+            author_id=author_id,
+            defaults={
+                'posts_count': Post.objects.filter(author_id=author_id).count()
+            }
+        )
+        return stats
+
+
+def change_posts_counts(author_deltas, group_deltas):
+    """Сдвигает счётчики на заданные величины: {id: delta}."""
+    for author_id, delta in author_deltas.items():
+        if not delta:
+            continue
+        updated = _shift(AuthorStats.objects.filter(author_id=author_id),
+                         delta)
+        if not updated and delta > 0:
+            # Строки ещё нет: create_for посчитает посты уже с учётом
+            # только что сохранённых.
+            AuthorStats.create_for(author_id)
+    for group_id, delta in group_deltas.items():
+        if group_id is not None and delta:
+            _shift(Group.objects.filter(pk=group_id), delta)
+
+
+def refresh_last_activity(group_ids=None):
+    """Пересчитывает last_activity групп: дату их новейшего поста.
+
+    Один UPDATE, новейший пост каждой группы берётся из индекса
+    (group, pub_date); без group_ids пересчитываются все группы.
+    """
+    groups = Group.objects.all()
+    if group_ids is not None:
+        groups = groups.filter(pk__in=set(group_ids) - {None})
+    newest = Post.objects.filter(group=OuterRef('pk')).order_by(
+        '-pub_date'
+    ).values('pub_date')[:1]
+    groups.update(last_activity=Subquery(newest))
+
+
+def _shift(queryset, delta):
+    if delta < 0:
+        queryset = queryset.filter(posts_count__gte=-delta)
+    return queryset.update(posts_count=F('posts_count') + delta)
+
+
+class PostQuerySet(models.QuerySet):
+    # Только то, что выводит posts/includes/post_card.html.
+    FEED_FIELDS = (
+        'excerpt', 'is_truncated', 'pub_date', 'author', 'group',
+        'author__username', 'author__first_name', 'author__last_name',
+        'group__slug', 'group__title',
+    )
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for post in objs:
+            post.render_text()
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            self._count_added(objs)
+        return objs
+
+    def bulk_import(self, objs):
+        """Как bulk_create, но значения полей вставляются как есть.
+
+        pub_date объявлено с auto_now_add, и bulk_create подставил бы
+        текущее время вместо исходной даты импортируемого поста.
+        """
+        objs = list(objs)
+        for post in objs:
+            if post.updated_at is None:
+                post.updated_at = post.pub_date
+            post.render_text()
+        fields = [field for field in self.model._meta.concrete_fields
+                  if not field.primary_key]
+        ops = connections[self.db].ops
+        batch_size = max(ops.bulk_batch_size(fields, objs), 1)
+        with transaction.atomic(using=self.db):
+            for start in range(0, len(objs), batch_size):
+                self._insert(objs[start:start + batch_size], fields=fields,
+                             raw=True, using=self.db)
+            self._count_added(objs)
+        return objs
+
+    def _count_added(self, objs):
+        change_posts_counts(
+            Counter(post.author_id for post in objs),
+            Counter(post.group_id for post in objs),
+        )
+        refresh_last_activity({post.group_id for post in objs})
+        # Здесь, а не сверху модуля: lookups сам импортирует модели.
+        from .lookups import evict_group_ids
+        after_commit(evict_group_ids, {post.group_id for post in objs})
+        # Сигналы при массовой вставке не отправляются, а она может
+        # затронуть любые ленты.
+        after_commit(bump_generations, ALL_PAGES)
+        after_commit(drop_timeline)
+
+    def feed(self):
+        """Посты для лент: автор и группа одним JOIN, лишние колонки
+        не загружаются."""
+        return self.select_related('author', 'group').only(*self.FEED_FIELDS)
+
 
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст поста',
                             help_text='Введите текст поста')
     pub_date = models.DateTimeField(verbose_name='Дата публикации',
                                     auto_now_add=True)
+    updated_at = models.DateTimeField(verbose_name='Дата изменения',
+                                      auto_now=True)
+    # Производные от text, их заполняет render_text при сохранении.
+    text_html = models.TextField(verbose_name='Текст в HTML',
+                                 editable=False, default='')
+    excerpt = models.TextField(verbose_name='Начало текста',
+                               editable=False, default='')
+    is_truncated = models.BooleanField(verbose_name='Текст обрезан',
+                                       editable=False, default=False)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -34,8 +212,100 @@ class Post(models.Model):
         help_text='Группа, к которой будет относиться пост'
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ('-pub_date',)
+        # Индексы по возрастанию: SQLite читает их в обратном порядке, а
+        # неявный rowid в конце индекса даёт и тай-брейкер -pk для
+        # keyset-паджинации, которого не было бы у индекса по -pub_date.
+        indexes = (
+            models.Index(fields=('pub_date',), name='post_pub_date_idx'),
+            models.Index(fields=('author', 'pub_date'),
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=('group', 'pub_date'),
+                         name='post_group_pub_date_idx'),
+        )
 
     def __str__(self):
         return self.text[:15]
+
+    def get_absolute_url(self):
+        return links.build('posts:post_detail', post_id=self.pk)
+
+    def get_edit_url(self):
+        return links.build('posts:post_edit', post_id=self.pk)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        if 'group_id' in field_names:
+            # Сигналы сравнивают с ней группу при сохранении и так
+            # замечают смену группы без лишнего запроса.
+            post._loaded_group_id = post.group_id
+        return post
+
+    def render_text(self):
+        """Заполняет text_html и excerpt по text.
+
+        Ленты показывают только excerpt, а страница поста — готовый HTML:
+        ни срезать, ни экранировать текст при отрисовке не нужно.
+        """
+        self.text_html = linebreaks(self.text, autoescape=True)
+        self.excerpt = Truncator(self.text).chars(EXCERPT_LENGTH)
+        self.is_truncated = self.excerpt != self.text
+
+    def save(self, *args, **kwargs):
+        self.render_text()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {
+                *update_fields, 'text_html', 'excerpt', 'is_truncated'
+            }
+        # Счётчики обновляются в post_save: пусть это будет та же транзакция.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class OutboxEvent(models.Model):
+    """Последствие изменения поста, ждущее обработки (см. outbox.py)."""
+    kind = models.CharField(max_length=50, verbose_name='Событие')
+    payload = models.TextField(verbose_name='Данные в JSON')
+    created = models.DateTimeField(auto_now_add=True,
+                                   verbose_name='Дата создания')
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Не раньше',
+        help_text='Повтор после ошибки или аренда обработчиком'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0,
+                                                verbose_name='Попыток')
+    processed_at = models.DateTimeField(null=True, blank=True,
+                                        verbose_name='Обработано')
+    last_error = models.TextField(blank=True,
+                                  verbose_name='Последняя ошибка')
+
+    class Meta:
+        ordering = ('pk',)
+        indexes = (
+            models.Index(fields=('processed_at', 'available_at'),
+                         name='outbox_pending_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk}'
+
+
+class ImportProgress(models.Model):
+    """Сколько записей источника уже импортировала команда import_posts.
+
+    Строка обновляется в транзакции очередной пачки постов, поэтому
+    прогресс и вставленные посты не расходятся даже при сбое между ними.
+    """
+    source = models.CharField(max_length=255, unique=True,
+                              verbose_name='Источник')
+    done = models.PositiveIntegerField(default=0,
+                                       verbose_name='Обработано записей')
+
+    def __str__(self):
+        return f'{self.source}: {self.done}'
@@ -0,0 +1,166 @@
+"""Отложенные последствия изменения постов: outbox и пул обработчиков.
+
+Сигнал поста записывает событие в таблицу OutboxEvent в той же
+транзакции, что и сам пост (Post.save открывает её), а после коммита
+событие уходит в пул из OUTBOX_WORKERS потоков. Ответ на запрос не ждёт
+ни ленты в кеше, ни сброса страниц.
+
+Обработчик берёт событие «в аренду», сдвигая available_at на
+OUTBOX_LEASE_SECONDS, так что одно событие не обработают дважды
+одновременно. После ошибки событие повторяется с задержкой
+OUTBOX_RETRY_DELAY, удваивающейся с каждой попыткой, до
+OUTBOX_MAX_ATTEMPTS попыток. Что не обработалось — например, процесс
+перезапустили, — добирает команда process_outbox. Она же удаляет
+обработанные события старше OUTBOX_RETENTION_DAYS дней, поэтому её
+стоит запускать по расписанию.
+
+При OUTBOX_WORKERS = 0 событие обрабатывается в том же потоке сразу
+после коммита и в таблицу не попадает.
+"""
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core import writer
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def handler(kind):
+    """Регистрирует функцию как обработчик событий kind."""
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def is_enabled():
+    return settings.OUTBOX_WORKERS > 0
+
+
+def get_executor():
+    global _executor, _executor_workers
+    workers = settings.OUTBOX_WORKERS
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix='outbox')
+            _executor_workers = workers
+        return _executor
+
+
+def enqueue(kind, **payload):
+    """Записывает событие и обрабатывает его после коммита транзакции."""
+    if not is_enabled():
+        # Обработчики сбрасывают кеш: и без пула — только после коммита.
+        transaction.on_commit(lambda: HANDLERS[kind](**payload))
+        return None
+    event = OutboxEvent.objects.create(
+        kind=kind, payload=json.dumps(payload, cls=DjangoJSONEncoder)
+    )
+    transaction.on_commit(lambda: submit(event.pk))
+    return event
+
+
+def _process_in_pool(event_id):
+    # Запроса вокруг потока пула нет: соединения после ошибки или старше
+    # CONN_MAX_AGE закрываем сами, как request_started и request_finished.
+    close_old_connections()
+    try:
+        return process(event_id)
+    finally:
+        close_old_connections()
+
+
+def submit(event_id):
+    get_executor().submit(_process_in_pool, event_id)
+
+
+def _claim(event_id):
+    now = timezone.now()
+    return OutboxEvent.objects.filter(
+        pk=event_id, processed_at__isnull=True, available_at__lte=now
+    ).update(
+        attempts=F('attempts') + 1,
+        available_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    )
+
+
+def _finish(event_id, **fields):
+    OutboxEvent.objects.filter(pk=event_id).update(**fields)
+
+
+def process(event_id, retry=True):
+    """Обрабатывает событие; True, если обработчик отработал без ошибки.
+
+    С retry неудачная попытка планирует следующую в пуле; команда
+    process_outbox повторяет сама.
+    """
+    if not writer.run(_claim, event_id):
+        return False
+    event = OutboxEvent.objects.get(pk=event_id)
+    try:
+        HANDLERS[event.kind](**json.loads(event.payload))
+    except Exception as error:
+        logger.exception('Событие %s не обработано', event)
+        delay = settings.OUTBOX_RETRY_DELAY * 2 ** (event.attempts - 1)
+        writer.run(_finish, event_id, last_error=repr(error),
+                   available_at=timezone.now() + timedelta(seconds=delay))
+        if retry and event.attempts < settings.OUTBOX_MAX_ATTEMPTS:
+            timer = threading.Timer(delay, submit, [event_id])
+            timer.daemon = True
+            timer.start()
+        return False
+    writer.run(_finish, event_id, processed_at=timezone.now(),
+               last_error='')
+    return True
+
+
+def pending():
+    """Необработанные события, которые никто не держит в аренде."""
+    return OutboxEvent.objects.filter(processed_at__isnull=True,
+                                      available_at__lte=timezone.now())
+
+
+def drain(queryset=None):
+    """Обрабатывает события по порядку; возвращает (успешно, с ошибкой)."""
+    queryset = pending() if queryset is None else queryset
+    done = failed = 0
+    for event_id in list(queryset.values_list('pk', flat=True)):
+        if process(event_id, retry=False):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
+
+
+def prune():
+    """Удаляет события, обработанные больше OUTBOX_RETENTION_DAYS дней
+    назад; возвращает их число."""
+    before = timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    deleted, _ = OutboxEvent.objects.filter(processed_at__lt=before).delete()
+    return deleted
+
+
+def replay(queryset):
+    """Возвращает события в очередь, даже уже обработанные."""
+    return queryset.update(processed_at=None, available_at=timezone.now(),
+                           attempts=0, last_error='')
@@ -0,0 +1,223 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(*values):
+    """Упаковывает значения ключа сортировки в непрозрачный токен."""
+    raw = json.dumps(values, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен; для битого токена возвращает None."""
+    if not token:
+        return None
+    padded = token + '=' * (-len(token) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list):
+        return None
+    return values
+
+
+class WindowedPage(Page):
+    """Страница, которая знает окно номеров для навигации."""
+
+    @property
+    def page_window(self):
+        return self.paginator.page_window(self.number)
+
+
+class CountedPaginator(Paginator):
+    """Paginator, которому число объектов можно передать готовым,
+    например из денормализованного счётчика, вместо COUNT(*)."""
+
+    # Сколько номеров показывать по бокам от текущей страницы и у краёв.
+    on_each_side = 2
+    on_ends = 1
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+    def page_window(self, number):
+        """Номера страниц для навигации: первые и последние on_ends,
+        on_each_side соседей текущей, None на месте пропуска.
+
+        Число номеров не зависит от числа страниц, в отличие от
+        page_range.
+        """
+        number = self.validate_number(number)
+        on_each_side, on_ends = self.on_each_side, self.on_ends
+        if self.num_pages <= (on_each_side + on_ends) * 2 + 1:
+            return list(self.page_range)
+        window = []
+        if number > on_each_side + on_ends + 2:
+            window.extend(range(1, on_ends + 1))
+            window.append(None)
+            window.extend(range(number - on_each_side, number + 1))
+        else:
+            window.extend(range(1, number + 1))
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            window.extend(range(number + 1, number + on_each_side + 1))
+            window.append(None)
+            window.extend(range(self.num_pages - on_ends + 1,
+                                self.num_pages + 1))
+        else:
+            window.extend(range(number + 1, self.num_pages + 1))
+        return window
+
+
+class CursorPage(Sequence):
+    """Страница keyset-паджинатора.
+
+    Повторяет часть интерфейса django.core.paginator.Page, которую
+    используют шаблоны, но не знает ни номера страницы, ни их числа.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<CursorPage of %s objects>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.cursor_for(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.cursor_for(self.object_list[0])
+
+
+class CursorPaginator:
+    """Keyset-паджинация по паре (поле даты, pk).
+
+    Поле и направление берутся из ordering, по умолчанию — из первого
+    элемента Meta.ordering модели, pk используется как уникальный
+    тай-брейкер. Каждая страница — один запрос с WHERE по ключу и LIMIT,
+    без OFFSET и COUNT(*), поэтому страница N стоит столько же, сколько
+    первая.
+
+    Поле может допускать NULL: как и SQLite при сортировке, паджинатор
+    считает NULL меньше любой даты, так что при убывающем порядке такие
+    строки идут в конце.
+    """
+
+    cursor = True
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        ordering = ordering or queryset.model._meta.ordering[0]
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        self.nullable = queryset.model._meta.get_field(self.field).null
+
+    def cursor_for(self, obj):
+        value = getattr(obj, self.field)
+        return encode_cursor(value and value.isoformat(), obj.pk)
+
+    def _parse(self, token):
+        values = decode_cursor(token)
+        if values is None or len(values) != 2:
+            return None
+        value, pk = values
+        if not isinstance(pk, int):
+            return None
+        if value is None and self.nullable:
+            return value, pk
+        value = parse_datetime(value) if isinstance(value, str) else None
+        if value is None:
+            return None
+        return value, pk
+
+    def _segments(self, key, forward):
+        """Запросы за ключом key в порядке обхода.
+
+        Строки с датой и строки с NULL идут отдельными запросами, и
+        каждый из них — диапазон индекса: условие с OR по NULL SQLite
+        выполнил бы обходом индекса с начала.
+        """
+        # «Вперёд» — дальше по ленте, то есть к более старым записям
+        # при убывающей сортировке.
+        lookup = 'lt' if forward == self.descending else 'gt'
+        prefix = '-' if lookup == 'lt' else ''
+        dated = nulls = self.queryset
+        if self.nullable:
+            dated = dated.filter(**{f'{self.field}__isnull': False})
+            nulls = nulls.filter(**{f'{self.field}__isnull': True})
+        else:
+            nulls = None
+        if key is not None:
+            value, pk = key
+            if value is None:
+                nulls = nulls.filter(**{f'pk__{lookup}': pk})
+                # NULL меньше любой даты: к старым записям после NULL
+                # дат уже нет.
+                if lookup == 'lt':
+                    dated = None
+            else:
+                # Нестрогое сравнение задаёт диапазон индекса, а OR
+                # отсекает в нём только строки с той же датой.
+                dated = dated.filter(
+                    Q(**{f'{self.field}__{lookup}e': value}),
+                    Q(**{f'{self.field}__{lookup}': value})
+                    | Q(**{f'pk__{lookup}': pk})
+                )
+                if lookup == 'gt':
+                    nulls = None
+        segments = [dated, nulls] if lookup == 'lt' else [nulls, dated]
+        return [segment.order_by(f'{prefix}{self.field}', f'{prefix}pk')
+                for segment in segments if segment is not None]
+
+    def get_page(self, after=None, before=None):
+        after_key = self._parse(after)
+        before_key = self._parse(before)
+        forward = before_key is None
+        key = after_key if forward else before_key
+        rows = []
+        for segment in self._segments(key, forward):
+            rows.extend(segment[:self.per_page + 1 - len(rows)])
+            if len(rows) > self.per_page:
+                break
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if forward:
+            return CursorPage(rows, self, has_more, after_key is not None)
+        rows.reverse()
+        return CursorPage(rows, self, True, has_more)
@@ -0,0 +1,88 @@
+"""Параллельные независимые запросы в представлениях лент.
+
+Django 2.2 не умеет асинхронные представления и ASGI, поэтому вместо
+async/await независимые запросы представления (поиск группы или автора,
+строки страницы, счётчик) отправляются в общий пул потоков. У каждого
+потока своё соединение с базой, так что запросы идут одновременно, а
+ожидание SQLite отпускает GIL.
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .pagination import CountedPaginator, WindowedPage
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def is_enabled():
+    return settings.CONCURRENT_QUERIES > 0
+
+
+def get_executor():
+    global _executor, _executor_workers
+    workers = settings.CONCURRENT_QUERIES
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='posts-queries'
+            )
+            _executor_workers = workers
+        return _executor
+
+
+def _call(call):
+    # Запроса вокруг потока пула нет: соединения после ошибки или старше
+    # CONN_MAX_AGE закрываем сами, как request_finished.
+    try:
+        return call()
+    finally:
+        close_old_connections()
+
+
+def run(*calls):
+    """Выполняет calls одновременно и возвращает их результаты по порядку.
+
+    Первый вызов выполняется в текущем потоке; исключение любого вызова,
+    например Http404, пробрасывается вызывающему. Потоки пула получают
+    копию контекста, поэтому читают ту же базу, что и представление (см.
+    core.routers).
+    """
+    if not is_enabled() or len(calls) < 2:
+        return [call() for call in calls]
+    executor = get_executor()
+    futures = [executor.submit(contextvars.copy_context().run, _call, call)
+               for call in calls[1:]]
+    first = calls[0]()
+    return [first] + [future.result() for future in futures]
+
+
+def page_number(request):
+    """Номер страницы из ?page=; нечисловой или меньше 1 — первая."""
+    try:
+        number = int(request.GET.get('page') or 1)
+    except ValueError:
+        return 1
+    return max(number, 1)
+
+
+def page_rows(queryset, number):
+    """Функция, читающая строки страницы number без подсчёта их числа."""
+    start = (number - 1) * settings.COUNT_POSTS
+    return lambda: list(queryset[start:start + settings.COUNT_POSTS])
+
+
+def build_page(queryset, number, rows, count):
+    """Страница из уже прочитанных строк, как CountedPaginator.get_page."""
+    paginator = CountedPaginator(queryset, settings.COUNT_POSTS, count=count)
+    if number > paginator.num_pages:
+        # Номер за концом ленты: get_page отдаст последнюю страницу.
+        return paginator.get_page(number)
+    return WindowedPage(rows, number, paginator)
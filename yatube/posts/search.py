@@ -0,0 +1,98 @@
+import re
+
+from django.db import connection
+
+from .models import Post
+from .pagination import CursorPage, decode_cursor, encode_cursor
+
+FTS_TABLE = 'posts_post_fts'
+
+MATCH_SQL = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+
+RANKED_SQL = (
+    f'SELECT rowid, rank FROM {FTS_TABLE} '
+    f'WHERE {FTS_TABLE} MATCH %s {{seek}} '
+    f'ORDER BY rank {{direction}}, rowid {{direction}} LIMIT %s'
+)
+
+
+def is_available():
+    """Полнотекстовый индекс есть только в SQLite (FTS5)."""
+    return connection.vendor == 'sqlite'
+
+
+def fts_query(text):
+    """Превращает пользовательский ввод в запрос FTS5.
+
+    Каждое слово берётся в кавычки, чтобы операторы и спецсимволы FTS5 из
+    ввода не ломали запрос, и ищется как префикс; слова объединяются по И.
+    """
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class SearchPaginator:
+    """Keyset-паджинация результатов поиска по паре (rank, rowid).
+
+    Отдаёт CursorPage, поэтому страницы выводит тот же
+    cursor_paginator.html, что и ленты.
+    """
+
+    cursor = True
+
+    def __init__(self, query, per_page):
+        self.match = fts_query(query)
+        self.per_page = int(per_page)
+
+    def cursor_for(self, post):
+        return encode_cursor(post.search_rank, post.pk)
+
+    def _parse(self, token):
+        values = decode_cursor(token)
+        if values is None or len(values) != 2:
+            return None
+        rank, pk = values
+        if not isinstance(rank, (int, float)) or not isinstance(pk, int):
+            return None
+        return rank, pk
+
+    def _ranked_ids(self, key, forward):
+        # bm25 в FTS5 отрицателен: лучшие совпадения идут первыми по
+        # возрастанию rank.
+        seek, params = '', [self.match]
+        if key is not None:
+            seek = 'AND (rank, rowid) {} (%s, %s)'.format(
+                '>' if forward else '<'
+            )
+            params.extend(key)
+        sql = RANKED_SQL.format(seek=seek,
+                                direction='ASC' if forward else 'DESC')
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [self.per_page + 1])
+            return cursor.fetchall()
+
+    def get_page(self, after=None, before=None):
+        if not self.match:
+            return CursorPage([], self, False, False)
+        after_key = self._parse(after)
+        before_key = self._parse(before)
+        forward = before_key is None
+        rows = self._ranked_ids(after_key if forward else before_key,
+                                forward)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        posts = Post.objects.feed().in_bulk([pk for pk, _ in rows])
+        object_list = []
+        for pk, rank in rows:
+            post = posts.get(pk)
+            if post is None:
+                # Пост удалили между поиском и чтением строк.
+                continue
+            post.search_rank = rank
+            object_list.append(post)
+        if forward:
+            return CursorPage(object_list, self, has_more,
+                              after_key is not None)
+        return CursorPage(object_list, self, True, has_more)
@@ -0,0 +1,210 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import lookups, outbox, timeline
+from .cache import (ALL_PAGES, after_commit, bump_generations,
+                    drop_timeline, group_scope, groups_scope, index_scope,
+                    invalidate_post_card, profile_scope)
+from .models import (Group, Post, User, change_posts_counts,
+                     refresh_last_activity)
+
+# Поля пользователя, которые видны на страницах лент.
+USER_FEED_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_group(sender, instance, raw, **kwargs):
+    instance._previous_group_id = None
+    if raw or instance._state.adding:
+        return
+    if not hasattr(instance, '_loaded_group_id'):
+        instance._loaded_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+    instance._previous_group_id = instance._loaded_group_id
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        change_posts_counts({instance.author_id: 1}, {instance.group_id: 1})
+        refresh_last_activity([instance.group_id])
+    elif instance._previous_group_id != instance.group_id:
+        change_posts_counts(
+            {}, {instance._previous_group_id: -1, instance.group_id: 1}
+        )
+        refresh_last_activity(
+            [instance._previous_group_id, instance.group_id]
+        )
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    change_posts_counts({instance.author_id: -1}, {instance.group_id: -1})
+    refresh_last_activity([instance.group_id])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def drop_post_card(sender, instance, **kwargs):
+    # После удаления Django обнуляет instance.pk, поэтому pk берём сразу.
+    after_commit(invalidate_post_card, instance.pk)
+
+
+def _drop_feed_pages(author_id, group_ids, username=None):
+    if username is None:
+        username = User.objects.filter(pk=author_id).values_list(
+            'username', flat=True
+        ).first()
+    slugs = list(Group.objects.filter(
+        pk__in=set(group_ids) - {None}
+    ).values_list('slug', flat=True))
+    # Число постов группы лежит и в кеше поиска по slug.
+    lookups.evict_groups(*slugs)
+    scopes = [index_scope()] + [group_scope(slug) for slug in slugs]
+    if slugs:
+        # В справочнике групп видны их число постов и последний пост.
+        scopes.append(groups_scope())
+    # Автора нет, если его удалили вместе с постами: тогда страницы
+    # сбросило удаление пользователя.
+    if username is not None:
+        scopes.append(profile_scope(username))
+    bump_generations(*scopes)
+
+
+@outbox.handler('post_saved')
+def refresh_feeds_after_save(post_id, created, raw, author_id, group_ids,
+                             username=None):
+    # Сначала лента, потом поколения: страница, собранная по новому
+    # поколению, должна увидеть и новую ленту.
+    if not raw and timeline.is_enabled():
+        post = Post.objects.filter(pk=post_id).only('pub_date').first()
+        if post is None:
+            # Пост удалили раньше, чем обработали его сохранение.
+            drop_timeline()
+        else:
+            timeline.post_saved(post, created)
+    _drop_feed_pages(author_id, group_ids, username)
+
+
+@outbox.handler('post_deleted')
+def refresh_feeds_after_delete(post_id, author_id, group_ids, username=None):
+    timeline.post_deleted(Post(pk=post_id))
+    _drop_feed_pages(author_id, group_ids, username)
+
+
+def _author(post):
+    """Автор для события: username — только если автор уже загружен,
+    иначе его найдёт обработчик, а не лишний запрос при записи."""
+    author = {'author_id': post.author_id}
+    if Post.author.is_cached(post):
+        author['username'] = post.author.username
+    return author
+
+
+@receiver(post_save, sender=Post)
+def enqueue_saved_post(sender, instance, created, raw, **kwargs):
+    outbox.enqueue(
+        'post_saved', post_id=instance.pk, created=created, raw=raw,
+        group_ids=[instance.group_id,
+                   getattr(instance, '_previous_group_id', None)],
+        **_author(instance)
+    )
+
+
+@receiver(post_delete, sender=Post)
+def enqueue_deleted_post(sender, instance, **kwargs):
+    outbox.enqueue('post_deleted', post_id=instance.pk,
+                   group_ids=[instance.group_id], **_author(instance))
+
+
+@receiver(pre_save, sender=Group)
+def remember_old_names(sender, instance, raw, **kwargs):
+    instance._previous_slug = instance._previous_title = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_slug, instance._previous_title = (
+        Group.objects.filter(pk=instance.pk).values_list(
+            'slug', 'title'
+        ).first() or (None, None)
+    )
+
+
+@receiver(post_save, sender=Group)
+def drop_group_pages(sender, instance, created, **kwargs):
+    scopes = [group_scope(instance.slug), groups_scope()]
+    renamed = (instance._previous_slug, instance._previous_title) != (
+        instance.slug, instance.title)
+    if not created and renamed:
+        # slug и название видны в карточках постов группы во всех лентах;
+        # правка одного описания их не трогает.
+        scopes.append(ALL_PAGES)
+        after_commit(drop_timeline)
+    after_commit(bump_generations, *scopes)
+
+
+@receiver(post_delete, sender=Group)
+def drop_deleted_group_pages(sender, **kwargs):
+    # Посты удалённой группы остаются в лентах, уже без неё.
+    after_commit(bump_generations, ALL_PAGES)
+    after_commit(drop_timeline)
+
+
+@receiver(pre_save, sender=User)
+def remember_old_user_names(sender, instance, raw, update_fields=None,
+                            **kwargs):
+    instance._previous_names = None
+    if raw or instance._state.adding or not (
+            update_fields is None
+            or USER_FEED_FIELDS & set(update_fields)):
+        return
+    instance._previous_names = User.objects.filter(
+        pk=instance.pk
+    ).values(*USER_FEED_FIELDS).first()
+
+
+def _feed_names_changed(user):
+    previous = getattr(user, '_previous_names', None)
+    return previous is not None and previous != {
+        field: getattr(user, field) for field in USER_FEED_FIELDS
+    }
+
+
+@receiver(post_save, sender=User)
+def drop_feed_pages_for_user(sender, instance, **kwargs):
+    # Регистрация, вход и смена пароля имён в лентах не меняют.
+    if _feed_names_changed(instance):
+        after_commit(bump_generations, ALL_PAGES)
+        after_commit(drop_timeline)
+
+
+@receiver(post_delete, sender=User)
+def drop_feed_pages_for_deleted_user(sender, **kwargs):
+    after_commit(bump_generations, ALL_PAGES)
+    after_commit(drop_timeline)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def evict_group_lookup(sender, instance, **kwargs):
+    # Создание группы тоже сбрасывает запись: там мог лежать «не найдено».
+    after_commit(lookups.evict_groups, instance.slug,
+                 getattr(instance, '_previous_slug', None))
+
+
+@receiver(post_save, sender=User)
+def evict_user_lookup(sender, instance, created, **kwargs):
+    if created:
+        # Там мог лежать «не найдено» для нового username.
+        after_commit(lookups.evict_users, instance.username)
+    elif _feed_names_changed(instance):
+        after_commit(lookups.evict_users, instance.username,
+                     instance._previous_names['username'])
+
+
+@receiver(post_delete, sender=User)
+def evict_deleted_user_lookup(sender, instance, **kwargs):
+    after_commit(lookups.evict_users, instance.username)
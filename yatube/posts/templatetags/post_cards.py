@@ -0,0 +1,30 @@
+from django import template
+from django.template import Context
+from django.utils.safestring import mark_safe
+
+from posts.cache import render_cards
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    """Отрисованные карточки постов страницы списком.
+
+    Неизменившиеся карточки берутся из кеша одним запросом на страницу:
+    {% post_cards page_obj as cards %}
+    """
+    group = context.get('group')
+    card = context.template.engine.get_template(CARD_TEMPLATE)
+    # Один контекст на все карточки страницы: каждая видит только post и
+    # group, а создавать Context на каждую не нужно.
+    card_context = Context({'group': group}, autoescape=context.autoescape)
+
+    def render(post):
+        with card_context.push(post=post):
+            return card.render(card_context)
+
+    return [mark_safe(html)
+            for html in render_cards(posts, render, show_group=not group)]
@@ -0,0 +1,77 @@
+import json
+from http import HTTPStatus
+
+from django.test import TestCase, TransactionTestCase
+
+from ..benchmark import (compare_throughput, read_paths, run_benchmarks,
+                         run_render_benchmarks, seed_data)
+from ..models import Group, Post
+
+
+class BenchmarkTest(TestCase):
+    def test_report_covers_all_views(self):
+        report = run_benchmarks(users=3, groups=2, posts=30, repeat=3)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertGreaterEqual(Post.objects.count(), 30)
+        self.assertEqual(
+            set(report['views']),
+            {'index', 'index_last_page', 'group_posts', 'profile',
+             'post_detail', 'post_create', 'post_edit'}
+        )
+        for name, result in report['views'].items():
+            with self.subTest(view=name):
+                self.assertIn(result['status'],
+                              (HTTPStatus.OK, HTTPStatus.FOUND))
+                self.assertGreater(result['queries'], 0)
+                self.assertGreater(result['peak_memory_kb'], 0)
+                latency = result['latency_ms']
+                self.assertLessEqual(latency['min'], latency['p50'])
+                self.assertLessEqual(latency['p50'], latency['p99'])
+                self.assertLessEqual(latency['p99'], latency['max'])
+        json.dumps(report)
+
+    def test_only_selected_views(self):
+        report = run_benchmarks(users=1, groups=1, posts=5, repeat=1,
+                                only=['post_detail'])
+        self.assertEqual(list(report['views']), ['post_detail'])
+
+
+class RenderBenchmarkTest(TestCase):
+    def test_report_covers_templates_sizes_and_profiles(self):
+        report = run_render_benchmarks(sizes=(2, 5), repeat=1)
+        self.assertEqual(set(report['templates']),
+                         {'development', 'production'})
+        for profile, templates in report['templates'].items():
+            self.assertEqual(
+                set(templates),
+                {'posts/index.html', 'posts/group_list.html',
+                 'posts/profile.html'}
+            )
+            for name, sizes in templates.items():
+                with self.subTest(profile=profile, template=name):
+                    self.assertEqual(set(sizes), {2, 5})
+                    self.assertGreater(sizes[5]['cold_ms'], 0)
+                    self.assertGreater(sizes[5]['per_card_ms'], 0)
+        self.assertEqual(set(report['urls']), {2, 5})
+        self.assertGreater(report['urls'][5]['reverse_ms'], 0)
+        json.dumps(report)
+
+
+class ThroughputTest(TransactionTestCase):
+    # Сервер отвечает из своих потоков и не видит данных незавершённой
+    # транзакции TestCase.
+
+    def test_compares_sequential_and_parallel_queries(self):
+        seed_data(users=2, groups=1, posts=15)
+        post = Post.objects.select_related('author', 'group').filter(
+            group__isnull=False
+        ).first()
+        paths = read_paths(post.author, post.group, post)
+        results = compare_throughput(paths, clients=2, requests=4,
+                                     workers=2)
+        self.assertEqual(set(results), set(paths))
+        for name, modes in results.items():
+            for mode, result in modes.items():
+                with self.subTest(view=name, mode=mode):
+                    self.assertEqual(result['errors'], 0)
+                    self.assertGreater(result['rps'], 0)
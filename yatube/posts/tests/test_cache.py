@@ -0,0 +1,237 @@
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import (Client, RequestFactory, TestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..cache import (PAGE_LOCK_KEY, _page_key, card_cache_stats,
+                     get_card_versions, get_generation, index_scope,
+                     profile_scope, reset_card_cache_stats)
+from ..models import Group, Post
+from .utils import run_on_commit
+
+User = get_user_model()
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth',
+                                            first_name='Лев',
+                                            last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+        )
+        for i in range(3):
+            cls.post = Post.objects.create(text=f'Пост {i}', author=cls.user,
+                                           group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        reset_card_cache_stats()
+        self.guest_client = Client()
+
+    def get_index(self):
+        reset_card_cache_stats()
+        response = self.guest_client.get(reverse('posts:index'))
+        return response.content.decode(), card_cache_stats()
+
+    def test_second_render_is_served_from_cache(self):
+        first, stats = self.get_index()
+        self.assertEqual(stats, {'hits': 0, 'misses': 3})
+        second, stats = self.get_index()
+        self.assertEqual(stats, {'hits': 3, 'misses': 0})
+        self.assertEqual(first, second)
+
+    def test_post_edit_invalidates_only_its_card(self):
+        self.get_index()
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Отредактированный пост'
+        with run_on_commit():
+            post.save()
+        content, stats = self.get_index()
+        self.assertEqual(stats, {'hits': 2, 'misses': 1})
+        self.assertIn('Отредактированный пост', content)
+
+    def test_author_rename_and_group_slug_change_invalidate(self):
+        self.get_index()
+        user = User.objects.get(pk=self.user.pk)
+        user.last_name = 'Достоевский'
+        user.save()
+        content, stats = self.get_index()
+        self.assertEqual(stats, {'hits': 0, 'misses': 3})
+        self.assertIn('Лев Достоевский', content)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'new-slug'
+        group.save()
+        content, stats = self.get_index()
+        self.assertEqual(stats, {'hits': 0, 'misses': 3})
+        self.assertIn('/group/new-slug/', content)
+
+    def test_group_page_and_index_cache_separate_variants(self):
+        self.get_index()
+        response = self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        )
+        self.assertNotContains(response, 'href="/group/test-slug/"')
+        content, _ = self.get_index()
+        self.assertIn('href="/group/test-slug/"', content)
+
+
+@override_settings(FEED_CACHE_TIMEOUT=60, FEED_CACHE_STALE_TIMEOUT=30)
+class FeedPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other_user = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+        Post.objects.create(text='Пост', author=cls.user, group=cls.group)
+        Post.objects.create(text='Пост', author=cls.other_user,
+                            group=cls.other_group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.urls = {
+            'index': reverse('posts:index'),
+            'profile': reverse('posts:profile',
+                               kwargs={'username': self.user}),
+            'other_profile': reverse('posts:profile',
+                                     kwargs={'username': self.other_user}),
+            'group': reverse('posts:group_list',
+                             kwargs={'slug': self.group.slug}),
+            'other_group': reverse('posts:group_list',
+                                   kwargs={'slug': self.other_group.slug}),
+        }
+        for url in self.urls.values():
+            self.guest_client.get(url)
+
+    def is_cached(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return not queries.captured_queries
+
+    def test_anonymous_pages_are_cached(self):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                self.assertTrue(self.is_cached(url))
+        self.assertTrue(self.is_cached(self.urls['index'] + '?utm=1'))
+        self.assertFalse(self.is_cached(self.urls['index'] + '?page=2'))
+
+    def test_new_post_purges_only_affected_pages(self):
+        with run_on_commit():
+            Post.objects.create(text='Новый пост', author=self.user,
+                                group=self.group)
+        expected = {
+            'index': False,
+            'profile': False,
+            'group': False,
+            'other_profile': True,
+            'other_group': True,
+        }
+        for name, cached in expected.items():
+            with self.subTest(page=name):
+                self.assertEqual(self.is_cached(self.urls[name]), cached)
+        self.assertContains(self.guest_client.get(self.urls['index']),
+                            'Новый пост')
+
+    def test_group_change_purges_old_and_new_group(self):
+        post = Post.objects.get(author=self.user)
+        post.group = self.other_group
+        with run_on_commit():
+            post.save()
+        self.assertFalse(self.is_cached(self.urls['group']))
+        self.assertFalse(self.is_cached(self.urls['other_group']))
+        self.assertTrue(self.is_cached(self.urls['other_profile']))
+
+    def test_account_changes_keep_feed_pages_cached(self):
+        with run_on_commit():
+            User.objects.create_user(username='new')
+            user = User.objects.get(pk=self.user.pk)
+            user.set_password('new-password')
+            user.save()
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                self.assertTrue(self.is_cached(url))
+        user.first_name = 'Лев'
+        with run_on_commit():
+            user.save()
+        self.assertFalse(self.is_cached(self.urls['index']))
+
+    def test_authenticated_users_bypass_cache(self):
+        self.guest_client.force_login(self.user)
+        self.assertFalse(self.is_cached(self.urls['index']))
+
+    def test_stale_page_is_served_while_regenerating(self):
+        with run_on_commit():
+            Post.objects.create(text='Новый пост', author=self.user)
+        request = RequestFactory().get(self.urls['index'])
+        lock_key = PAGE_LOCK_KEY.format(_page_key(index_scope(), request))
+        cache.add(lock_key, 1)
+        self.assertTrue(self.is_cached(self.urls['index']))
+        self.assertNotContains(self.guest_client.get(self.urls['index']),
+                               'Новый пост')
+        cache.delete(lock_key)
+        self.assertFalse(self.is_cached(self.urls['index']))
+        self.assertContains(self.guest_client.get(self.urls['index']),
+                            'Новый пост')
+
+    def test_works_with_file_based_cache(self):
+        with tempfile.TemporaryDirectory() as location:
+            caches = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': location,
+            }}
+            with override_settings(CACHES=caches):
+                self.assertFalse(self.is_cached(self.urls['index']))
+                self.assertFalse(self.is_cached(self.urls['other_profile']))
+                self.assertTrue(self.is_cached(self.urls['index']))
+                with run_on_commit():
+                    Post.objects.create(text='Новый пост', author=self.user)
+                self.assertFalse(self.is_cached(self.urls['index']))
+                self.assertTrue(self.is_cached(self.urls['other_profile']))
+
+
+class InvalidationOnCommitTest(TransactionTestCase):
+    # Нужны настоящие коммиты и откаты, а не транзакция TestCase.
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(text='Пост', author=self.user)
+
+    def state(self):
+        return (get_generation(index_scope()),
+                get_generation(profile_scope('auth')),
+                get_card_versions([self.post.pk]))
+
+    def test_caches_are_invalidated_only_after_commit(self):
+        before = self.state()
+        with transaction.atomic():
+            self.post.text = 'Новый текст'
+            self.post.save()
+            Post.objects.create(text='Второй', author=self.user)
+            self.assertEqual(self.state(), before)
+        after = self.state()
+        for old, new in zip(before, after):
+            self.assertNotEqual(old, new)
+
+    def test_rolled_back_write_keeps_caches(self):
+        before = self.state()
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                self.post.text = 'Новый текст'
+                self.post.save()
+                User.objects.filter(pk=self.user.pk).get().save()
+                raise ValueError
+        self.assertEqual(self.state(), before)
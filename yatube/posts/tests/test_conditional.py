@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+from .utils import run_on_commit
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(text='Текст', author=cls.user,
+                                       group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_list', kwargs={'slug': 'group'}),
+            'profile': reverse('posts:profile', kwargs={'username': 'auth'}),
+            'post': reverse('posts:post_detail',
+                            kwargs={'post_id': self.post.pk}),
+        }
+
+    def etags(self, client=None):
+        client = client or self.guest_client
+        return {name: client.get(url)['ETag']
+                for name, url in self.urls.items()}
+
+    def test_unchanged_pages_answer_304_without_rendering(self):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Cookie', response['Vary'])
+                with self.assertNumQueries(1 if name == 'post' else 0):
+                    by_etag = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(by_etag.status_code, 304)
+                self.assertFalse(by_etag.templates)
+                by_date = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(by_date.status_code, 304)
+
+    def test_page_number_is_part_of_etag(self):
+        first = self.guest_client.get(self.urls['index'])
+        second = self.guest_client.get(self.urls['index'], {'page': 2})
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def test_post_edit_changes_validators(self):
+        before = self.etags()
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        with run_on_commit():
+            post.save()
+        after = self.etags()
+        for name in self.urls:
+            with self.subTest(page=name):
+                self.assertNotEqual(before[name], after[name])
+        post.refresh_from_db()
+        self.assertGreater(post.updated_at, post.pub_date)
+
+    def test_delete_and_rename_change_validators(self):
+        with run_on_commit():
+            Post.objects.create(text='Второй', author=self.user)
+        before = self.etags()
+        with run_on_commit():
+            Post.objects.filter(group__isnull=True).delete()
+        after_delete = self.etags()
+        self.assertNotEqual(before['profile'], after_delete['profile'])
+        self.assertNotEqual(before['post'], after_delete['post'])
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Лев'
+        with run_on_commit():
+            user.save()
+        after_rename = self.etags()
+        for name in self.urls:
+            with self.subTest(page=name):
+                self.assertNotEqual(after_delete[name], after_rename[name])
+
+    def test_etag_depends_on_viewer(self):
+        client = Client()
+        client.force_login(self.user)
+        self.assertNotEqual(self.etags(), self.etags(client))
+
+    def test_missing_post_is_404(self):
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 1000}),
+            HTTP_IF_NONE_MATCH='*'
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,148 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+START = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        # Две пары постов с одинаковой датой проверяют тай-брейкер по id.
+        dates = [START, START, START + timedelta(days=1),
+                 START + timedelta(days=1), START + timedelta(days=2)]
+        Post.objects.bulk_import(
+            Post(text=f'Пост {number}', author=cls.user,
+                 group=cls.group if number % 2 else None, pub_date=date)
+            for number, date in enumerate(dates)
+        )
+        cls.posts = list(Post.objects.order_by('pub_date', 'id'))
+
+    def setUp(self):
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def run_export(self, *args, name='posts.jsonl.gz'):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, name)
+        stderr = io.StringIO()
+        call_command('export_posts', path, *args, stderr=stderr)
+        with gzip.open(path, 'rt', encoding='utf-8') as source:
+            return source.read(), stderr.getvalue()
+
+    def test_exports_all_posts_in_small_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            content, _ = self.run_export('--batch-size', '2')
+        records = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([record['id'] for record in records],
+                         [post.pk for post in self.posts])
+        self.assertEqual(records[1], {
+            'id': self.posts[1].pk,
+            'text': 'Пост 1',
+            'pub_date': START.isoformat(),
+            'author': 'auth',
+            'group': 'group',
+        })
+        self.assertIsNone(records[0]['group'])
+        self.assertEqual(len(queries), 3)
+        for query in queries:
+            self.assertNotIn('OFFSET', query['sql'])
+
+    def test_incremental_export_continues_after_key(self):
+        _, report = self.run_export('--batch-size', '2')
+        last = self.posts[-1]
+        self.assertIn(f'--after-id {last.pk}', report)
+        content, _ = self.run_export(
+            '--since', self.posts[0].pub_date.isoformat(),
+            '--after-id', str(self.posts[0].pk),
+        )
+        ids = [json.loads(line)['id'] for line in content.splitlines()]
+        self.assertEqual(ids, [post.pk for post in self.posts[1:]])
+        content, _ = self.run_export('--since', START.isoformat())
+        self.assertEqual(len(content.splitlines()), 3)
+
+    def test_exports_csv_readable_by_import(self):
+        content, _ = self.run_export(name='posts.csv.gz')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), len(self.posts))
+        self.assertEqual(rows[1]['author'], 'auth')
+        self.assertEqual(rows[1]['group'], 'group')
+
+    def test_endpoint_is_staff_only(self):
+        url = reverse('posts:export')
+        self.assertEqual(Client().get(url).status_code, 403)
+        author = Client()
+        author.force_login(self.user)
+        self.assertEqual(author.get(url).status_code, 403)
+
+    def test_endpoint_streams_gzip(self):
+        response = self.staff_client.get(reverse('posts:export'),
+                                         {'format': 'csv'},
+                                         HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(len(content.decode().splitlines()),
+                         len(self.posts) + 1)
+
+    def test_endpoint_is_compressed_once_by_gzip_middleware(self):
+        middleware = ['django.middleware.gzip.GZipMiddleware'] + list(
+            settings.MIDDLEWARE
+        )
+        url = reverse('posts:export')
+        with self.settings(MIDDLEWARE=middleware):
+            compressed = self.staff_client.get(url,
+                                               HTTP_ACCEPT_ENCODING='gzip')
+            plain = self.staff_client.get(url)
+        content = gzip.decompress(b''.join(compressed.streaming_content))
+        self.assertEqual(content, b''.join(plain.streaming_content))
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(len(content.decode().splitlines()), len(self.posts))
+
+    def test_endpoint_continues_after_key(self):
+        url = reverse('posts:export')
+        response = self.staff_client.get(url, {
+            'since': self.posts[0].pub_date.isoformat(),
+            'after_id': self.posts[0].pk,
+        })
+        ids = [json.loads(line)['id'] for line in
+               b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(ids, [post.pk for post in self.posts[1:]])
+
+    def test_endpoint_rejects_bad_parameters(self):
+        url = reverse('posts:export')
+        self.assertEqual(
+            self.staff_client.get(url, {'format': 'xml'}).status_code, 400
+        )
+        self.assertEqual(
+            self.staff_client.get(url, {'since': 'вчера'}).status_code, 400
+        )
+        for params in ({'after_id': self.posts[0].pk},
+                       {'since': START.isoformat(), 'after_id': 'x'}):
+            with self.subTest(params=params):
+                self.assertEqual(
+                    self.staff_client.get(url, params).status_code, 400
+                )
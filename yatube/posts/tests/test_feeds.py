@@ -0,0 +1,117 @@
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post
+from .utils import run_on_commit
+
+User = get_user_model()
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class SyndicationFeedsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth',
+                                            first_name='Лев',
+                                            last_name='Толстой')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание группы')
+        cls.post = Post.objects.create(text='Пост в группе', author=cls.user,
+                                       group=cls.group)
+        Post.objects.create(text='Пост без группы', author=cls.other)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def rss_titles(self, url):
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        root = ElementTree.fromstring(response.content)
+        return [item.findtext('title') for item in root.iter('item')]
+
+    def test_rss_feeds(self):
+        feeds = {
+            reverse('posts:index_rss'): ['Пост без группы', 'Пост в группе'],
+            reverse('posts:group_rss', kwargs={'slug': 'group'}):
+                ['Пост в группе'],
+            reverse('posts:profile_rss', kwargs={'username': 'other'}):
+                ['Пост без группы'],
+        }
+        for url, titles in feeds.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.rss_titles(url), titles)
+
+    def test_atom_feed(self):
+        response = self.guest_client.get(
+            reverse('posts:profile_atom', kwargs={'username': 'auth'})
+        )
+        self.assertEqual(response['Content-Type'],
+                         'application/atom+xml; charset=utf-8')
+        root = ElementTree.fromstring(response.content)
+        self.assertEqual(root.findtext(f'{ATOM}title'),
+                         'Yatube: посты Лев Толстой')
+        entry = root.find(f'{ATOM}entry')
+        self.assertEqual(entry.findtext(f'{ATOM}author/{ATOM}name'),
+                         'Лев Толстой')
+        self.assertTrue(entry.find(f'{ATOM}link').get('href').endswith(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        ))
+
+    def test_unknown_group_or_author_is_404(self):
+        for url in (reverse('posts:group_rss', kwargs={'slug': 'missing'}),
+                    reverse('posts:profile_atom',
+                            kwargs={'username': 'missing'})):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 404)
+
+    def test_feed_is_cached_until_posts_change(self):
+        url = reverse('posts:group_rss', kwargs={'slug': 'group'})
+        self.rss_titles(url)
+        with self.assertNumQueries(0):
+            self.rss_titles(url)
+        with run_on_commit():
+            Post.objects.create(text='Новый пост', author=self.other,
+                                group=self.group)
+        self.assertEqual(self.rss_titles(url),
+                         ['Новый пост', 'Пост в группе'])
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'example.com'])
+    def test_cached_feed_links_follow_request_host(self):
+        url = reverse('posts:index_rss')
+        self.guest_client.get(url)
+        for host, secure, prefix in (('example.com', False,
+                                      'http://example.com/'),
+                                     ('testserver', True,
+                                      'https://testserver/')):
+            with self.subTest(host=host, secure=secure):
+                response = self.guest_client.get(url, HTTP_HOST=host,
+                                                 secure=secure)
+                root = ElementTree.fromstring(response.content)
+                self.assertTrue(
+                    root.find('channel/item/link').text.startswith(prefix)
+                )
+
+    def test_conditional_get(self):
+        url = reverse('posts:index_atom')
+        response = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_pages_link_their_feeds(self):
+        response = self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'group'})
+        )
+        self.assertContains(
+            response, reverse('posts:group_atom', kwargs={'slug': 'group'})
+        )
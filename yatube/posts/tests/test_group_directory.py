@@ -0,0 +1,141 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..cache import get_generation, group_scope, groups_scope, index_scope
+from ..models import Group, Post
+from .utils import run_on_commit
+
+User = get_user_model()
+
+
+@override_settings(COUNT_GROUPS=2, FEED_CACHE_TIMEOUT=60)
+class GroupDirectoryTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}')
+            for i in range(4)
+        ]
+        for group in cls.groups[1:]:
+            Post.objects.create(text='Пост', author=cls.user, group=group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.url = reverse('posts:group_directory')
+
+    def get_page(self, client=None, **params):
+        response = (client or self.guest_client).get(self.url, params)
+        return response.context['page_obj']
+
+    def pages(self):
+        """Все страницы каталога подряд, по курсору «вперёд»."""
+        pages, params = [], {}
+        while True:
+            page_obj = self.get_page(**params)
+            pages.append([(group.slug, group.posts_count)
+                          for group in page_obj])
+            if not page_obj.next_cursor:
+                return pages
+            params = {'after': page_obj.next_cursor}
+
+    def test_groups_ordered_by_last_activity(self):
+        self.assertEqual(self.pages(), [[('group-3', 1), ('group-2', 1)],
+                                        [('group-1', 1), ('group-0', 0)]])
+
+    def test_groups_without_posts_are_paged_by_pk(self):
+        Group.objects.create(title='Пустая', slug='empty')
+        cache.clear()
+        self.assertEqual(self.pages(), [[('group-3', 1), ('group-2', 1)],
+                                        [('group-1', 1), ('empty', 0)],
+                                        [('group-0', 0)]])
+        client = Client()
+        client.force_login(self.user)
+        page_obj = self.get_page(client)
+        for _ in range(2):
+            page_obj = self.get_page(client, after=page_obj.next_cursor)
+        previous = self.get_page(client, before=page_obj.previous_cursor)
+        self.assertEqual([group.slug for group in previous],
+                         ['group-1', 'empty'])
+        first = self.get_page(client, before=previous.previous_cursor)
+        self.assertEqual([group.slug for group in first],
+                         ['group-3', 'group-2'])
+
+    def test_pages_are_keyset_queries_without_posts_table(self):
+        client = Client()
+        client.force_login(self.user)
+        cursor = self.get_page(client).next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page(client, after=cursor)
+        sql = [query['sql'] for query in queries.captured_queries
+               if 'posts_group' in query['sql']]
+        # Группы с постами и группы без постов (last_activity IS NULL)
+        # читаются отдельными диапазонами индекса.
+        self.assertEqual(len(sql), 2)
+        self.assertIn('"last_activity" <=', sql[0])
+        self.assertIn('"last_activity" IS NULL', sql[1])
+        for query in sql:
+            self.assertNotIn('OFFSET', query)
+            self.assertNotIn('COUNT', query)
+            self.assertNotIn('posts_post', query)
+
+    def test_post_changes_refresh_aggregates_and_cached_page(self):
+        self.pages()
+        with run_on_commit():
+            post = Post.objects.create(text='Новый', author=self.user,
+                                       group=self.groups[0])
+        self.assertEqual(self.pages()[0], [('group-0', 1), ('group-3', 1)])
+        post.group = self.groups[1]
+        with run_on_commit():
+            post.save()
+        self.assertEqual(self.pages(), [[('group-1', 2), ('group-3', 1)],
+                                        [('group-2', 1), ('group-0', 0)]])
+        with run_on_commit():
+            post.delete()
+        self.assertEqual(self.pages()[0], [('group-3', 1), ('group-2', 1)])
+
+    def test_last_activity_is_newest_post_date(self):
+        old_date = datetime(2010, 1, 1, tzinfo=dt_timezone.utc)
+        Post.objects.bulk_import([Post(text='Старый', author=self.user,
+                                       group=self.groups[0],
+                                       pub_date=old_date)])
+        group = Group.objects.get(pk=self.groups[0].pk)
+        self.assertEqual(group.last_activity, old_date)
+        newest = Post.objects.filter(group=self.groups[3]).get()
+        self.assertEqual(Group.objects.get(pk=self.groups[3].pk).last_activity,
+                         newest.pub_date)
+
+    def test_new_group_appears_on_cached_pages(self):
+        self.pages()
+        with run_on_commit():
+            Group.objects.create(title='Новая', slug='new')
+        self.assertEqual(self.pages(), [[('group-3', 1), ('group-2', 1)],
+                                        [('group-1', 1), ('new', 0)],
+                                        [('group-0', 0)]])
+
+    def test_description_edit_keeps_other_feeds_cached(self):
+        group = Group.objects.get(pk=self.groups[1].pk)
+        scopes = (index_scope(), group_scope(group.slug), groups_scope())
+
+        def changed(before):
+            return [old != get_generation(scope)
+                    for scope, old in zip(scopes, before)]
+
+        before = [get_generation(scope) for scope in scopes]
+        group.description = 'Новое описание'
+        with run_on_commit():
+            group.save()
+        self.assertEqual(changed(before), [False, True, True])
+        before = [get_generation(scope) for scope in scopes]
+        group.title = 'Новое название'
+        with run_on_commit():
+            group.save()
+        self.assertEqual(changed(before), [True, True, True])
@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError
+from django.test import TestCase
+
+from ..management.commands.import_posts import Command
+from ..models import AuthorStats, Group, ImportProgress, Post
+
+User = get_user_model()
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write(content)
+        return path
+
+    def jsonl(self, records):
+        return ''.join(json.dumps(record, ensure_ascii=False) + '\n'
+                       for record in records)
+
+    def run_import(self, path, *args):
+        call_command('import_posts', path, *args, stdout=StringIO())
+
+    def test_imports_jsonl_with_original_dates(self):
+        path = self.write('posts.jsonl', self.jsonl([
+            {'text': 'Старый пост', 'author': 'auth', 'group': 'group',
+             'pub_date': '2010-05-01T12:30:00+00:00'},
+            {'text': 'Без группы', 'author': 'auth',
+             'pub_date': '2011-01-01T00:00:00'},
+            {'text': 'Чужой', 'author': 'nobody'},
+            {'text': '', 'author': 'auth'},
+        ]))
+        self.run_import(path, '--batch-size', '3')
+        self.assertEqual(Post.objects.count(), 2)
+        post = Post.objects.get(text='Старый пост')
+        self.assertEqual(post.pub_date,
+                         datetime(2010, 5, 1, 12, 30, tzinfo=dt_timezone.utc))
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(AuthorStats.count_for(self.user.pk), 2)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+
+    def test_create_missing_authors_and_groups(self):
+        path = self.write('posts.csv', (
+            'text,author,group,pub_date\n'
+            'Пост,new_author,new-group,2015-03-03T10:00:00Z\n'
+            'Ещё пост,new_author,,\n'
+        ))
+        self.run_import(path, '--create-missing')
+        author = User.objects.get(username='new_author')
+        self.assertFalse(author.has_usable_password())
+        self.assertEqual(Group.objects.get(slug='new-group').posts_count, 1)
+        self.assertEqual(author.posts.count(), 2)
+
+    def test_resume_after_failure(self):
+        good = [{'text': f'Пост {i}', 'author': 'auth'} for i in range(5)]
+        content = self.jsonl(good[:2]) + '{broken\n' + self.jsonl(good[2:])
+        path = self.write('posts.jsonl', content)
+        with self.assertRaises(CommandError):
+            self.run_import(path, '--batch-size', '2')
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(ImportProgress.objects.get(source=path).done, 2)
+        self.write('posts.jsonl', self.jsonl(good[:2] + [good[4]]
+                                             + good[2:]))
+        self.run_import(path, '--batch-size', '2')
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            sorted(['Пост 0', 'Пост 1', 'Пост 4', 'Пост 2', 'Пост 3',
+                    'Пост 4'])
+        )
+        self.assertFalse(ImportProgress.objects.exists())
+
+    def test_batch_is_rolled_back_with_its_progress(self):
+        path = self.write('posts.jsonl', self.jsonl(
+            [{'text': f'Пост {i}', 'author': 'auth'} for i in range(4)]
+        ))
+        save_state = Command.save_state
+
+        def fail_second_batch(command, state_key, done):
+            save_state(command, state_key, done)
+            if done > 2:
+                raise DatabaseError('disk I/O error')
+
+        with mock.patch.object(Command, 'save_state', fail_second_batch):
+            with self.assertRaises(DatabaseError):
+                self.run_import(path, '--batch-size', '2')
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(ImportProgress.objects.get(source=path).done, 2)
+        self.run_import(path, '--batch-size', '2')
+        self.assertEqual(Post.objects.count(), 4)
+
+    def test_pub_date_that_is_not_a_string_is_skipped(self):
+        path = self.write('posts.jsonl', self.jsonl([
+            {'text': 'Число', 'author': 'auth', 'pub_date': 1262304000},
+            {'text': 'null', 'author': 'auth', 'pub_date': None},
+            {'text': 'Без даты', 'author': 'auth'},
+        ]))
+        self.run_import(path)
+        self.assertEqual(list(Post.objects.values_list('text', flat=True)),
+                         ['Без даты'])
+
+    def test_new_file_after_finished_import_starts_from_beginning(self):
+        path = self.write('posts.jsonl', self.jsonl(
+            [{'text': 'Первый', 'author': 'auth'}]
+        ))
+        self.run_import(path)
+        self.write('posts.jsonl', self.jsonl(
+            [{'text': 'Второй', 'author': 'auth'}]
+        ))
+        self.run_import(path)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_line_that_is_not_an_object_is_reported(self):
+        for line in ('[1, 2]', '"текст"', '42', 'null'):
+            with self.subTest(line=line):
+                path = self.write('posts.jsonl', line + '\n')
+                with self.assertRaisesMessage(CommandError,
+                                              'Строка 1: не объект JSON'):
+                    self.run_import(path, '--restart')
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,65 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'SCAN (TABLE )?posts_post(?! USING)')
+
+
+class FeedIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+        )
+        Post.objects.bulk_create(
+            [Post(text=f'Пост {i}', author=cls.user, group=cls.group)
+             for i in range(30)]
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def feed_plans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if 'ORDER BY' not in query['sql']:
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans.append(' | '.join(row[-1] for row in cursor.fetchall()))
+        return plans
+
+    def assertUsesIndexes(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                plans = self.feed_plans(url)
+                self.assertTrue(plans)
+                for plan in plans:
+                    self.assertNotIn('TEMP B-TREE', plan)
+                    self.assertIsNone(FULL_SCAN.search(plan), plan)
+
+    def test_listing_views_use_indexes(self):
+        self.assertUsesIndexes()
+
+    @override_settings(CURSOR_PAGINATION=True)
+    def test_cursor_listing_views_use_indexes(self):
+        self.assertUsesIndexes()
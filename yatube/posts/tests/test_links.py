@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse, set_script_prefix
+
+from .. import links
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class LinksTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = [User.objects.create_user(username=username)
+                     for username in ('auth', 'Лев', 'a.b+c@d', 'x-y_z')]
+        cls.groups = [Group.objects.create(title=slug, slug=slug)
+                      for slug in ('group', 'Group_1', 'with-dash')]
+        cls.post = Post.objects.create(text='Пост', author=cls.users[0],
+                                       group=cls.groups[0])
+
+    def assertMatchesReverse(self):
+        cases = [(self.post.get_absolute_url(),
+                  reverse('posts:post_detail',
+                          kwargs={'post_id': self.post.pk})),
+                 (self.post.get_edit_url(),
+                  reverse('posts:post_edit',
+                          kwargs={'post_id': self.post.pk}))]
+        cases += [(group.get_absolute_url(),
+                   reverse('posts:group_list', kwargs={'slug': group.slug}))
+                  for group in self.groups]
+        cases += [(user.get_absolute_url(),
+                   reverse('posts:profile',
+                           kwargs={'username': user.username}))
+                  for user in self.users]
+        for built, expected in cases:
+            with self.subTest(url=expected):
+                self.assertEqual(built, expected)
+
+    def test_paths_match_reverse(self):
+        self.assertMatchesReverse()
+
+    def test_paths_follow_script_prefix(self):
+        self.addCleanup(set_script_prefix, '/')
+        set_script_prefix('/yatube/')
+        self.assertTrue(self.post.get_absolute_url().startswith('/yatube/'))
+        self.assertMatchesReverse()
+
+    def test_value_equal_to_marker(self):
+        self.assertEqual(
+            links.build('posts:post_detail', post_id=links.MARKER + '00'),
+            reverse('posts:post_detail',
+                    kwargs={'post_id': links.MARKER + '00'})
+        )
+
+    def test_cards_link_post_group_and_author(self):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        for url in (self.groups[0].get_absolute_url(),
+                    self.users[0].get_absolute_url(),
+                    self.post.get_edit_url()):
+            self.assertContains(response, f'href="{url}"')
@@ -0,0 +1,149 @@
+import warnings
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import lookups
+from ..models import Group, Post
+from .utils import run_on_commit
+
+User = get_user_model()
+
+LOOKUP_SQL = ('"posts_group"."slug" =', '"auth_user"."username" =')
+
+
+class LRUCacheTest(SimpleTestCase):
+    def test_size_and_expiry(self):
+        lru = lookups.LRUCache()
+        lru.set('a', 1, 60, size=2)
+        lru.set('b', 2, 60, size=2)
+        lru.get('a')
+        lru.set('c', 3, 60, size=2)
+        self.assertEqual(lru.get('b'), (False, None))
+        self.assertEqual(lru.get('a'), (True, 1))
+        lru.set('a', None, 0, size=2)
+        self.assertEqual(lru.get('a'), (False, None))
+
+
+@override_settings(LOOKUP_CACHE_TIMEOUT=300, LOOKUP_LOCAL_TIMEOUT=5)
+class LookupCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth',
+                                            first_name='Лев')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(text='Пост', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        lookups.local_cache.clear()
+        self.addCleanup(lookups.local_cache.clear)
+        self.client = Client()
+        self.urls = {
+            'group': reverse('posts:group_list', kwargs={'slug': 'group'}),
+            'profile': reverse('posts:profile', kwargs={'username': 'auth'}),
+        }
+
+    def lookup_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        lookups_done = [query['sql'] for query in queries.captured_queries
+                        if any(sql in query['sql'] for sql in LOOKUP_SQL)]
+        return response, len(lookups_done)
+
+    def test_warm_pages_skip_lookup_query(self):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response, count = self.lookup_queries(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(count, 1)
+                self.assertEqual(self.lookup_queries(url)[1], 0)
+                # Общий кеш сброшен, как будто запись шла в другом
+                # процессе, — LRU этого процесса ещё отвечает.
+                cache.clear()
+                self.assertEqual(self.lookup_queries(url)[1], 0)
+
+    @override_settings(LOOKUP_LOCAL_TIMEOUT=0)
+    def test_shared_cache_without_local_lru(self):
+        url = self.urls['group']
+        self.lookup_queries(url)
+        self.assertEqual(self.lookup_queries(url)[1], 0)
+        cache.clear()
+        self.assertEqual(self.lookup_queries(url)[1], 1)
+
+    def test_missing_objects_are_cached_until_created(self):
+        url = reverse('posts:group_list', kwargs={'slug': 'new'})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 404)
+        # «Не найдено» помнит только LRU процесса, не общий кеш.
+        lookups.local_cache.clear()
+        self.assertEqual(self.lookup_queries(url)[1], 1)
+        with run_on_commit():
+            Group.objects.create(title='Новая', slug='new')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        url = reverse('posts:profile', kwargs={'username': 'new'})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with run_on_commit():
+            User.objects.create_user(username='new')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_renames_evict_lookups(self):
+        for url in self.urls.values():
+            self.client.get(url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        group.title = 'Новое название'
+        with run_on_commit():
+            group.save()
+        self.assertEqual(self.client.get(self.urls['group']).status_code,
+                         404)
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'renamed'})
+        )
+        self.assertEqual(response.context['group'].title, 'Новое название')
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Фёдор'
+        with run_on_commit():
+            user.save()
+        response = self.client.get(self.urls['profile'])
+        self.assertEqual(response.context['author'].first_name, 'Фёдор')
+        user.username = 'renamed'
+        with run_on_commit():
+            user.save()
+        self.assertEqual(self.client.get(self.urls['profile']).status_code,
+                         404)
+
+    @override_settings(COUNT_POSTS=1)
+    def test_post_changes_refresh_cached_group_count(self):
+        self.client.get(self.urls['group'])
+        with run_on_commit():
+            Post.objects.create(text='Ещё', author=self.user,
+                                group=self.group)
+        response = self.client.get(self.urls['group'])
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 2)
+        with run_on_commit():
+            Post.objects.bulk_create(
+                [Post(text='Пачкой', author=self.user, group=self.group)]
+            )
+        response = self.client.get(self.urls['group'])
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 3)
+
+    def test_keys_are_safe_for_memcached(self):
+        url = reverse('posts:profile', kwargs={'username': 'нет такого'})
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            self.assertEqual(self.client.get(url).status_code, 404)
+            self.assertEqual(self.client.get(self.urls['profile']).status_code,
+                             200)
+
+    def test_login_does_not_evict_author(self):
+        self.client.get(self.urls['profile'])
+        self.client.force_login(self.user)
+        self.assertEqual(self.lookup_queries(self.urls['profile'])[1], 0)
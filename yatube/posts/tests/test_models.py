@@ -1,7 +1,13 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-from ..models import Group, Post
+from ..models import EXCERPT_LENGTH, AuthorStats, Group, Post
 
 User = get_user_model()
 
@@ -24,3 +30,118 @@ class PostModelTest(TestCase):
     def test_models_have_correct_object_names(self):
         self.assertEqual(PostModelTest.post.text[:15], str(PostModelTest.post))
         self.assertEqual(PostModelTest.group.title, str(PostModelTest.group))
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+
+    def assertCounts(self, author, group, other_group):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(AuthorStats.count_for(self.user.pk), author)
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.other_group.posts_count, other_group)
+
+    def test_counters_follow_create_edit_and_delete(self):
+        post = Post.objects.create(author=self.user, text='Пост',
+                                   group=self.group)
+        Post.objects.create(author=self.user, text='Без группы')
+        self.assertCounts(2, 1, 0)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertCounts(2, 0, 1)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertCounts(2, 0, 1)
+        post.delete()
+        self.assertCounts(1, 0, 0)
+
+    def test_bulk_create_updates_counters(self):
+        Post.objects.bulk_create(
+            [Post(author=self.user, text='Пост', group=self.group)] * 3
+        )
+        self.assertCounts(3, 3, 0)
+
+    def test_recount_command_repairs_drift(self):
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        AuthorStats.objects.update(posts_count=42)
+        Group.objects.update(posts_count=7)
+        call_command('recount_posts', stdout=StringIO())
+        self.assertCounts(1, 1, 0)
+
+    def test_listing_views_do_not_count_posts(self):
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        urls = (
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(url)
+                for query in queries.captured_queries:
+                    self.assertNotIn('COUNT(', query['sql'])
+
+
+class PostRenderedTextTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.long_text = 'Длинный <b>пост</b>\n\nВторой абзац. ' * 100
+        cls.post = Post.objects.create(author=cls.user, text=cls.long_text)
+
+    def test_html_and_excerpt_are_stored_on_save(self):
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertTrue(post.text_html.startswith(
+            '<p>Длинный &lt;b&gt;пост&lt;/b&gt;</p>\n\n<p>Второй абзац.'
+        ))
+        self.assertTrue(post.is_truncated)
+        self.assertEqual(len(post.excerpt), EXCERPT_LENGTH)
+        self.assertEqual(post.excerpt[:-1],
+                         self.long_text[:EXCERPT_LENGTH - 1])
+        post.text = 'Короткий'
+        post.save(update_fields=['text'])
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual(
+            (post.text_html, post.excerpt, post.is_truncated),
+            ('<p>Короткий</p>', 'Короткий', False)
+        )
+
+    def test_bulk_paths_render_text(self):
+        Post.objects.bulk_create([Post(author=self.user, text='Пачкой')])
+        Post.objects.bulk_import([Post(author=self.user, text='Импорт',
+                                       pub_date=self.post.pub_date)])
+        self.assertEqual(
+            set(Post.objects.filter(text__in=('Пачкой', 'Импорт'))
+                .values_list('text_html', 'excerpt')),
+            {('<p>Пачкой</p>', 'Пачкой'), ('<p>Импорт</p>', 'Импорт')}
+        )
+
+    def test_feeds_do_not_load_full_text(self):
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.filter(pk=self.post.pk).update(group=group)
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:index_rss'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                for query in queries.captured_queries:
+                    self.assertNotIn('"posts_post"."text"', query['sql'])
+                self.assertNotContains(response, self.long_text[:500])
+        response = self.client.get(urls[0])
+        self.assertContains(response, 'читать дальше')
+        response = self.client.get(urls[-1])
+        self.assertContains(response, self.post.text_html)
@@ -0,0 +1,147 @@
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .. import outbox, signals, timeline
+from ..cache import get_generation, index_scope
+from ..models import OutboxEvent, Post
+from .utils import run_on_commit
+
+User = get_user_model()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('Не дождались обработки outbox')
+        time.sleep(0.01)
+
+
+class InlineOutboxTest(TestCase):
+    def test_without_workers_effects_run_after_commit(self):
+        cache.clear()
+        user = User.objects.create_user(username='auth')
+        generation = get_generation(index_scope())
+        with run_on_commit():
+            Post.objects.create(text='Текст', author=user)
+            self.assertEqual(get_generation(index_scope()), generation)
+        self.assertNotEqual(get_generation(index_scope()), generation)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    @override_settings(OUTBOX_RETENTION_DAYS=7)
+    def test_command_prunes_old_processed_events(self):
+        now = timezone.now()
+        old, recent, waiting = (
+            OutboxEvent.objects.create(kind='test', payload='{}',
+                                       processed_at=processed_at)
+            for processed_at in (now - timedelta(days=8),
+                                 now - timedelta(days=6), None)
+        )
+        with mock.patch.dict(outbox.HANDLERS, {'test': lambda: None}):
+            call_command('process_outbox', stdout=StringIO())
+        self.assertEqual(
+            set(OutboxEvent.objects.values_list('pk', flat=True)),
+            {recent.pk, waiting.pk}
+        )
+
+    def test_author_is_not_loaded_to_enqueue(self):
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(text='Текст', author=user)
+        post = Post.objects.get(pk=post.pk)
+        post.text = 'Правка'
+        with self.assertNumQueries(0):
+            signals._author(post)
+        with mock.patch.object(outbox, 'enqueue') as enqueue:
+            post.save()
+        self.assertEqual(enqueue.call_args[1]['author_id'], user.pk)
+        self.assertNotIn('username', enqueue.call_args[1])
+
+
+@override_settings(OUTBOX_WORKERS=1, OUTBOX_RETRY_DELAY=0.01,
+                   OUTBOX_MAX_ATTEMPTS=3, TIMELINE_SIZE=5)
+class OutboxWorkersTest(TransactionTestCase):
+    # Пул читает события через свои соединения и после коммита.
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.calls = []
+
+    def processed(self, event):
+        event.refresh_from_db()
+        return event.processed_at is not None
+
+    def test_post_effects_are_processed_after_commit(self):
+        timeline.rebuild()
+        generation = get_generation(index_scope())
+        post = Post.objects.create(text='Текст', author=self.user)
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.kind, 'post_saved')
+        wait_for(lambda: self.processed(event))
+        self.assertEqual(event.attempts, 1)
+        self.assertNotEqual(get_generation(index_scope()), generation)
+        self.assertEqual(timeline.get()['posts'], [post])
+        self.assertEqual(timeline.check(), [])
+
+    def test_rolled_back_post_leaves_no_event(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                Post.objects.create(text='Текст', author=self.user)
+                raise ValueError
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def flaky(self, fail_times):
+        def handle(**payload):
+            self.calls.append(payload)
+            if len(self.calls) <= fail_times:
+                raise RuntimeError('кеш недоступен')
+        return handle
+
+    def test_failed_event_is_retried(self):
+        with mock.patch.dict(outbox.HANDLERS, {'test': self.flaky(1)}), \
+                self.assertLogs('posts.outbox', 'ERROR'):
+            event = outbox.enqueue('test', value=1)
+            wait_for(lambda: self.processed(event))
+        self.assertEqual(event.attempts, 2)
+        self.assertEqual(event.last_error, '')
+        self.assertEqual(self.calls, [{'value': 1}] * 2)
+
+    def test_pool_threads_release_connections(self):
+        with mock.patch.dict(outbox.HANDLERS, {'test': self.flaky(0)}), \
+                mock.patch.object(outbox, 'close_old_connections') as close:
+            event = outbox.enqueue('test', value=1)
+            wait_for(lambda: self.processed(event))
+            wait_for(lambda: close.call_count == 2)
+
+    def test_command_drains_and_replays(self):
+        with mock.patch.dict(outbox.HANDLERS, {'test': self.flaky(3)}), \
+                self.assertLogs('posts.outbox', 'ERROR') as logs:
+            event = outbox.enqueue('test', value=1)
+            wait_for(lambda: len(self.calls) == 3)
+            # Дать истечь задержке после последней попытки.
+            time.sleep(0.1)
+            event.refresh_from_db()
+            self.assertIsNone(event.processed_at)
+            self.assertIn('кеш недоступен', event.last_error)
+            call_command('process_outbox', stdout=StringIO())
+            self.assertTrue(self.processed(event))
+            call_command('process_outbox', '--replay', str(event.pk),
+                         stdout=StringIO())
+        self.assertEqual(len(self.calls), 5)
+        self.assertEqual(len(logs.output), 3)
+
+    def test_command_fails_on_failed_events(self):
+        with mock.patch.dict(outbox.HANDLERS, {'test': self.flaky(10)}), \
+                self.assertLogs('posts.outbox', 'ERROR'):
+            OutboxEvent.objects.create(kind='test', payload='{}')
+            with self.assertRaisesMessage(CommandError, 'с ошибкой: 1'):
+                call_command('process_outbox', stdout=StringIO())
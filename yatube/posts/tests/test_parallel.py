@@ -0,0 +1,85 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .. import parallel
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(COUNT_POSTS=3)
+class ParallelQueriesTest(TransactionTestCase):
+    # Потоки пула читают через свои соединения и не видят данных
+    # незавершённой транзакции TestCase.
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        for i in range(7):
+            self.post = Post.objects.create(text=f'Пост {i}',
+                                            author=self.user,
+                                            group=self.group)
+        self.client = Client()
+
+    def pages(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        ]
+        pages = []
+        for url in urls:
+            for page in ('1', '3', '100', 'x'):
+                response = self.client.get(url, {'page': page})
+                page_obj = response.context['page_obj']
+                pages.append((url, page, page_obj.number,
+                              page_obj.paginator.count,
+                              page_obj.page_window,
+                              [post.pk for post in page_obj]))
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        pages.append((response.context['post'].pk,
+                      response.context['posts_count']))
+        return pages
+
+    def test_same_pages_as_sequential_views(self):
+        sequential = self.pages()
+        with override_settings(CONCURRENT_QUERIES=3):
+            self.assertEqual(self.pages(), sequential)
+
+    @override_settings(CONCURRENT_QUERIES=3)
+    def test_missing_objects_give_404(self):
+        urls = [
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            reverse('posts:profile', kwargs={'username': 'missing'}),
+            reverse('posts:post_detail', kwargs={'post_id': 1000}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    @override_settings(CONCURRENT_QUERIES=3)
+    def test_queries_run_in_pool_threads(self):
+        threads = set()
+
+        def call():
+            threads.add(threading.current_thread().name)
+            return Post.objects.count()
+
+        self.assertEqual(parallel.run(call, call, call), [7, 7, 7])
+        self.assertTrue(any(name.startswith('posts-queries')
+                            for name in threads))
+
+    @override_settings(CONCURRENT_QUERIES=3)
+    def test_pool_threads_release_connections(self):
+        with mock.patch.object(parallel, 'close_old_connections') as close:
+            parallel.run(Post.objects.count, Post.objects.count,
+                         Post.objects.count)
+        self.assertEqual(close.call_count, 2)
@@ -0,0 +1,126 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..search import SearchPaginator, fts_query
+
+User = get_user_model()
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.weak = Post.objects.create(
+            author=cls.user,
+            text='Кот вышел во двор, а потом долго гулял по городу.'
+        )
+        cls.strong = Post.objects.create(author=cls.user,
+                                         text='Кот, кот и ещё раз кот')
+        Post.objects.create(author=cls.user, text='Про собак')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query, **params):
+        response = self.guest_client.get(reverse('posts:search'),
+                                         {'q': query, **params})
+        return response.context['page_obj']
+
+    def test_fts_query_escapes_user_input(self):
+        self.assertEqual(fts_query('кот" OR (NEAR'),
+                         '"кот"* "OR"* "NEAR"*')
+        self.assertEqual(fts_query('  *** '), '')
+
+    def test_results_are_ranked(self):
+        page_obj = self.search('кот')
+        self.assertEqual([post.pk for post in page_obj],
+                         [self.strong.pk, self.weak.pk])
+
+    def test_prefix_and_all_words_match(self):
+        self.assertEqual([post.pk for post in self.search('гуля двор')],
+                         [self.weak.pk])
+        self.assertEqual(list(self.search('кот собак')), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        post = Post.objects.get(pk=self.weak.pk)
+        post.text = 'Теперь про собак'
+        post.save()
+        self.assertEqual([p.pk for p in self.search('кот')],
+                         [self.strong.pk])
+        Post.objects.get(pk=self.strong.pk).delete()
+        self.assertEqual(list(self.search('кот')), [])
+
+    def test_post_deleted_after_ranking_is_skipped(self):
+        ranked = SearchPaginator._ranked_ids
+
+        def ranked_then_deleted(paginator, *args):
+            rows = ranked(paginator, *args)
+            Post.objects.filter(pk=self.strong.pk).delete()
+            return rows
+
+        with mock.patch.object(SearchPaginator, '_ranked_ids',
+                               ranked_then_deleted):
+            page_obj = self.search('кот')
+        self.assertEqual([post.pk for post in page_obj], [self.weak.pk])
+
+    def test_bulk_created_posts_are_indexed(self):
+        Post.objects.bulk_create(
+            [Post(author=self.user, text=f'Попугай {i}') for i in range(3)]
+        )
+        self.assertEqual(len(self.search('попугай')), 3)
+
+    def test_triggers_survive_table_rebuilds(self):
+        # Миграции 0006 и 0008 пересоздают posts_post и сами возвращают
+        # триггеры индекса.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'posts_post'"
+            )
+            triggers = {name for name, in cursor.fetchall()}
+        self.assertEqual(triggers, {'posts_post_fts_ai', 'posts_post_fts_ad',
+                                    'posts_post_fts_au'})
+        post = Post.objects.create(author=self.user, text='Про енотов')
+        self.assertEqual(list(self.search('енот')), [post])
+
+    @override_settings(COUNT_POSTS=2)
+    def test_results_are_keyset_paginated(self):
+        Post.objects.bulk_create(
+            [Post(author=self.user, text='кот ' * i) for i in range(1, 4)]
+        )
+        seen, params = [], {}
+        while True:
+            page_obj = self.search('кот', **params)
+            seen.extend(post.pk for post in page_obj)
+            if not page_obj.next_cursor:
+                break
+            params = {'after': page_obj.next_cursor}
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+        previous = self.search('кот', before=page_obj.previous_cursor)
+        self.assertEqual(len(previous), 2)
+        self.assertNotIn(previous[0].pk, [post.pk for post in page_obj])
+
+    def test_empty_query_renders_form_only(self):
+        response = self.guest_client.get(reverse('posts:search'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['page_obj'])
+
+    def test_admin_search_uses_index(self):
+        client = Client()
+        client.force_login(self.admin)
+        response = client.get(reverse('admin:posts_post_changelist'),
+                              {'q': 'кот'})
+        self.assertEqual(
+            {post.pk for post in response.context['cl'].result_list},
+            {self.strong.pk, self.weak.pk}
+        )
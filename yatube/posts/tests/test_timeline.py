@@ -0,0 +1,129 @@
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import timeline
+from ..cache import TIMELINE_KEY
+from ..models import Group, Post
+from .utils import run_on_commit
+
+User = get_user_model()
+
+
+@override_settings(TIMELINE_SIZE=5, COUNT_POSTS=2)
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        for i in range(7):
+            Post.objects.create(text=f'Пост {i}', author=cls.user,
+                                group=cls.group if i % 2 else None)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def page_ids(self, page):
+        response = self.guest_client.get(reverse('posts:index'),
+                                         {'page': page})
+        return [post.pk for post in response.context['page_obj']]
+
+    def expected_ids(self):
+        return list(timeline.queryset().values_list('pk', flat=True))
+
+    def all_pages(self):
+        ids = []
+        for page in range(1, 6):
+            ids.extend(self.page_ids(page))
+            if len(ids) >= Post.objects.count():
+                break
+        return ids
+
+    def test_first_pages_need_no_queries(self):
+        self.page_ids(1)
+        with self.assertNumQueries(0):
+            self.page_ids(1)
+        with self.assertNumQueries(0):
+            self.page_ids(2)
+
+    def test_pages_past_cap_fall_back_to_database(self):
+        self.assertEqual(self.all_pages(), self.expected_ids())
+        response = self.guest_client.get(reverse('posts:index'),
+                                         {'page': 4})
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 4)
+
+    def test_writes_keep_timeline_consistent(self):
+        self.page_ids(1)
+        with run_on_commit():
+            post = Post.objects.create(text='Новый пост', author=self.user)
+        self.assertEqual(timeline.check(), [])
+        self.assertEqual(self.page_ids(1)[0], post.pk)
+
+        newest = Post.objects.get(pk=post.pk)
+        newest.text = 'Исправленный пост'
+        newest.group = self.group
+        with run_on_commit():
+            newest.save()
+        self.assertEqual(timeline.check(), [])
+        cached = timeline.get()['posts'][0]
+        self.assertEqual(cached.text, 'Исправленный пост')
+        self.assertEqual(cached.group.slug, 'group')
+
+        oldest = Post.objects.order_by('pub_date').first()
+        oldest.text = 'Старый пост'
+        with run_on_commit():
+            oldest.save()
+        self.assertEqual(timeline.check(), [])
+
+        with run_on_commit():
+            newest.delete()
+            Post.objects.order_by('-pub_date')[2].delete()
+        self.assertEqual(timeline.check(), [])
+        self.assertEqual(self.all_pages(), self.expected_ids())
+
+    def test_rename_drops_timeline(self):
+        self.page_ids(1)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        with run_on_commit():
+            group.save()
+        self.assertIsNone(cache.get(TIMELINE_KEY))
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'renamed')
+
+    def test_check_command_reports_drift(self):
+        timeline.rebuild()
+        call_command('rebuild_timeline', '--check', stdout=StringIO())
+        post = Post.objects.order_by('-pub_date').first()
+        # Удаление в обход сигналов.
+        Post.objects.filter(pk=post.pk)._raw_delete(using='default')
+        with self.assertRaises(CommandError):
+            call_command('rebuild_timeline', '--check', stdout=StringIO())
+        call_command('rebuild_timeline', stdout=StringIO())
+        self.assertEqual(timeline.check(), [])
+
+    @override_settings(TIMELINE_CACHE_TIMEOUT=60)
+    def test_lost_update_expires(self):
+        timeline.rebuild()
+        post = Post.objects.order_by('-pub_date').first()
+        Post.objects.filter(pk=post.pk)._raw_delete(using='default')
+        self.assertNotEqual(timeline.check(), [])
+        later = time.time() + 61
+        with mock.patch('django.core.cache.backends.locmem.time.time',
+                        return_value=later):
+            self.assertIsNone(cache.get(TIMELINE_KEY))
+            self.assertNotIn(post.pk, self.page_ids(1))
+
+    @override_settings(TIMELINE_SIZE=0)
+    def test_disabled_timeline_is_not_cached(self):
+        self.page_ids(1)
+        Post.objects.create(text='Новый пост', author=self.user)
+        self.assertIsNone(cache.get(TIMELINE_KEY))
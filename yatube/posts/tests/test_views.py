@@ -1,9 +1,12 @@
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django import forms
 
 from ..forms import PostForm
+from ..pagination import CountedPaginator
 from ..models import Post, Group
 
 User = get_user_model()
@@ -137,3 +140,174 @@ class PaginatorViewsTest(TestCase):
                 self.assertEqual(len(response.context['page_obj']), 10)
                 response = self.authorized_client.get(reverse_name + '?page=2')
                 self.assertEqual(len(response.context['page_obj']), 3)
+
+
+@override_settings(CURSOR_PAGINATION=True, COUNT_POSTS=10)
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+        )
+        Post.objects.bulk_create(
+            [Post(text=f'Пост {i}', author=cls.user, group=cls.group)
+             for i in range(25)]
+        )
+        cls.ordered_ids = list(
+            Post.objects.order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def walk(self, url):
+        ids, query, pages = [], '', []
+        while True:
+            response = self.guest_client.get(url + query)
+            page_obj = response.context['page_obj']
+            pages.append(page_obj)
+            ids.extend(post.pk for post in page_obj)
+            if not page_obj.next_cursor:
+                return ids, pages
+            query = f'?after={page_obj.next_cursor}'
+
+    def test_pages_cover_feed_in_order(self):
+        urls = [reverse('posts:index'),
+                reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+                reverse('posts:profile', kwargs={'username': self.user})]
+        for url in urls:
+            with self.subTest(url=url):
+                ids, pages = self.walk(url)
+                self.assertEqual(ids, self.ordered_ids)
+                self.assertEqual([len(page) for page in pages], [10, 10, 5])
+                self.assertFalse(pages[0].has_previous())
+                self.assertTrue(pages[-1].has_previous())
+
+    def test_before_returns_previous_page(self):
+        url = reverse('posts:index')
+        _, pages = self.walk(url)
+        response = self.guest_client.get(
+            f'{url}?before={pages[-1].previous_cursor}'
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual([post.pk for post in page_obj],
+                         [post.pk for post in pages[1]])
+        self.assertTrue(page_obj.has_next())
+
+    def test_next_page_costs_same_as_first(self):
+        url = reverse('posts:index')
+        _, pages = self.walk(url)
+        with CaptureQueriesContext(connection) as first:
+            self.guest_client.get(url)
+        with CaptureQueriesContext(connection) as last:
+            self.guest_client.get(
+                f'{url}?after={pages[0].next_cursor}'
+            )
+        self.assertEqual(len(first), len(last))
+        for query in last.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        response = self.guest_client.get(
+            reverse('posts:index') + '?after=not-a-cursor'
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj[0].pk, self.ordered_ids[0])
+        self.assertFalse(page_obj.has_previous())
+
+
+class PageWindowTest(SimpleTestCase):
+    def window(self, number, num_pages):
+        return CountedPaginator(range(num_pages), 1).page_window(number)
+
+    def test_window_around_current_page(self):
+        self.assertEqual(self.window(50, 100),
+                         [1, None, 48, 49, 50, 51, 52, None, 100])
+        self.assertEqual(self.window(1, 100), [1, 2, 3, None, 100])
+        self.assertEqual(self.window(5, 100),
+                         [1, 2, 3, 4, 5, 6, 7, None, 100])
+        self.assertEqual(self.window(100, 100), [1, None, 98, 99, 100])
+        self.assertEqual(self.window(3, 7), [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(self.window(1, 1), [1])
+
+
+@override_settings(COUNT_POSTS=1)
+class PageWindowViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def add_posts(self, count):
+        Post.objects.bulk_create(
+            [Post(text='Пост', author=self.user) for _ in range(count)]
+        )
+
+    def page(self, number):
+        response = self.client.get(reverse('posts:index'), {'page': number})
+        return response.content.decode().count('class="page-item'), response
+
+    def test_navigation_size_does_not_grow_with_posts(self):
+        self.add_posts(20)
+        items, response = self.page(10)
+        self.assertContains(response, '&hellip;', count=2)
+        self.add_posts(2000)
+        more_items, more_response = self.page(10)
+        self.assertEqual(items, more_items)
+        self.assertContains(more_response, '?page=2020')
+        self.assertNotContains(more_response, '?page=1000"')
+        # Отличаются только цифры номера последней страницы.
+        self.assertLess(
+            abs(len(more_response.content) - len(response.content)), 20
+        )
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+        )
+        posts = []
+        for i in range(25):
+            author = User.objects.create_user(username=f'author{i}')
+            group = Group.objects.create(title=f'Группа {i}', slug=f'g-{i}')
+            posts.append(Post(text=f'Пост {i}', author=author, group=group))
+            posts.append(Post(text=f'Пост {i}', author=cls.user,
+                              group=cls.group))
+        Post.objects.bulk_create(posts)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def count_queries(self, url, per_page):
+        with override_settings(COUNT_POSTS=per_page):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.guest_client.get(url)
+        self.assertEqual(len(response.context['page_obj']), per_page)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        urls = [reverse('posts:index'),
+                reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+                reverse('posts:profile', kwargs={'username': self.user})]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url, 5),
+                                 self.count_queries(url, 20))
+
+    def test_feed_defers_unused_columns(self):
+        post = Post.objects.feed().first()
+        self.assertIn('password', post.author.get_deferred_fields())
+        self.assertIn('description', post.group.get_deferred_fields())
+        with self.assertNumQueries(0):
+            post.author.get_full_name()
+            post.group.slug
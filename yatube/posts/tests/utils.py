@@ -0,0 +1,20 @@
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+@contextmanager
+def run_on_commit():
+    """Выполняет on_commit-колбэки, отложенные внутри блока.
+
+    TestCase Django 2.2 держит тест в транзакции, которая не коммитится,
+    и сброс кеша после коммита сам не наступает. Повторяет
+    captureOnCommitCallbacks(execute=True) из Django 3.2.
+    """
+    start = len(connection.run_on_commit)
+    yield
+    while len(connection.run_on_commit) > start:
+        callbacks = connection.run_on_commit[start:]
+        del connection.run_on_commit[start:]
+        for _, func in callbacks:
+            func()
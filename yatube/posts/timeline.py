@@ -0,0 +1,148 @@
+"""Лента последних постов, поддерживаемая при записи.
+
+В кеше лежат TIMELINE_SIZE самых новых постов главной страницы (вместе с
+автором и группой, то есть всем, что нужно карточке) и общее число
+постов. После коммита сохранения или удаления поста обработчик outbox
+правит её на месте, поэтому первые страницы index отдаются без запросов
+к базе; страницы дальше TIMELINE_SIZE читаются из базы как обычно.
+Лента хранится TIMELINE_CACHE_TIMEOUT секунд и после пересобирается:
+если правка потерялась, расхождение с базой не живёт дольше.
+"""
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.routers import primary
+
+from .cache import TIMELINE_KEY, TIMELINE_LOCK_KEY, drop_timeline
+from .models import Post
+
+# Сколько секунд писатель может держать блокировку ленты.
+LOCK_TIMEOUT = 10
+
+
+def is_enabled():
+    return settings.TIMELINE_SIZE > 0
+
+
+def _sort_key(post):
+    return post.pub_date, post.pk
+
+
+def queryset():
+    # pk разрешает равенство дат так же, как _sort_key, иначе на границе
+    # ленты и базы пост мог бы повториться или пропасть.
+    return Post.objects.feed().order_by('-pub_date', '-pk')
+
+
+def rebuild():
+    """Собирает ленту из основной базы и кладёт в кеш."""
+    with primary():
+        entry = {
+            'posts': list(queryset()[:settings.TIMELINE_SIZE]),
+            'count': Post.objects.count(),
+        }
+    cache.set(TIMELINE_KEY, entry, settings.TIMELINE_CACHE_TIMEOUT)
+    return entry
+
+
+def get():
+    entry = cache.get(TIMELINE_KEY)
+    if entry is None:
+        entry = rebuild()
+    return entry
+
+
+def _update(change):
+    """Применяет change(entry) к ленте в кеше.
+
+    Кеш не умеет сравнивать и записывать атомарно, поэтому правка идёт под
+    блокировкой; если её держит другой писатель, ленту проще сбросить,
+    чем рисковать потерять одну из правок.
+    """
+    if not is_enabled():
+        return
+    if not cache.add(TIMELINE_LOCK_KEY, 1, LOCK_TIMEOUT):
+        drop_timeline()
+        return
+    try:
+        entry = cache.get(TIMELINE_KEY)
+        if entry is None:
+            return
+        if change(entry) is False:
+            drop_timeline()
+        else:
+            cache.set(TIMELINE_KEY, entry, settings.TIMELINE_CACHE_TIMEOUT)
+    finally:
+        cache.delete(TIMELINE_LOCK_KEY)
+
+
+def post_saved(post, created):
+    def change(entry):
+        size = settings.TIMELINE_SIZE
+        posts = [item for item in entry['posts'] if item.pk != post.pk]
+        if created:
+            entry['count'] += 1
+        elif len(posts) == len(entry['posts']):
+            # Правка поста, который в ленту не попал.
+            return
+        if len(posts) >= size and _sort_key(post) < _sort_key(posts[-1]):
+            entry['posts'] = posts
+            return
+        posts.append(Post.objects.feed().get(pk=post.pk))
+        posts.sort(key=_sort_key, reverse=True)
+        entry['posts'] = posts[:size]
+    _update(change)
+
+
+def post_deleted(post):
+    def change(entry):
+        posts = [item for item in entry['posts'] if item.pk != post.pk]
+        entry['count'] -= 1
+        # Освободилось место, а следующий пост есть только в базе.
+        if len(posts) < len(entry['posts']) and entry['count'] > len(posts):
+            return False
+        entry['posts'] = posts
+    _update(change)
+
+
+def check():
+    """Сравнивает ленту в кеше с базой; возвращает список расхождений."""
+    entry = cache.get(TIMELINE_KEY)
+    if entry is None:
+        return []
+    problems = []
+    cached = [post.pk for post in entry['posts']]
+    expected = list(queryset().values_list('pk', flat=True)[
+        :settings.TIMELINE_SIZE
+    ])
+    if cached != expected:
+        problems.append(f'посты: в кеше {cached}, в базе {expected}')
+    count = Post.objects.count()
+    if entry['count'] != count:
+        problems.append(f'число постов: в кеше {entry["count"]}, '
+                        f'в базе {count}')
+    return problems
+
+
+class TimelineList(Sequence):
+    """Список для Paginator: срезы в пределах ленты берутся из кеша,
+    дальше — из fallback."""
+
+    def __init__(self, entry, fallback):
+        self.posts = entry['posts']
+        self.count = entry['count']
+        self.fallback = fallback
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.stop is not None and index.stop <= len(self.posts):
+                return self.posts[index]
+            return list(self.fallback[index])
+        if index < len(self.posts):
+            return self.posts[index]
+        return self.fallback[index]
@@ -1,32 +1,88 @@
+import re
+
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
+from django.utils.cache import patch_vary_headers
+
+from core import writer
+from core.routers import read_only
 
-from .models import Group, Post, User
+from .cache import (cache_anonymous_page, group_scope, groups_scope,
+                    index_scope, profile_scope)
+from .conditional import conditional_feed, conditional_post
+from .models import AuthorStats, Group, Post
 from .forms import PostForm
+from .pagination import CountedPaginator, CursorPaginator
+from . import export as post_export
+from . import lookups
+from . import parallel
+from . import search as post_search
+from . import timeline
+
+# Та же проверка Accept-Encoding, что в GZipMiddleware.
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
 
+def use_concurrent_queries():
+    # Keyset-страницы зависят от курсора, а не от номера: их читаем как
+    # обычно.
+    return parallel.is_enabled() and not settings.CURSOR_PAGINATION
 
-def paginate_queryset(queryset, request):
-    paginator = Paginator(queryset, settings.COUNT_POSTS)
+
+def paginate_queryset(queryset, request, count=None):
+    if settings.CURSOR_PAGINATION:
+        paginator = CursorPaginator(queryset, settings.COUNT_POSTS)
+        return paginator.get_page(after=request.GET.get('after'),
+                                  before=request.GET.get('before'))
+    paginator = CountedPaginator(queryset, settings.COUNT_POSTS, count=count)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
 
 
+@read_only
+@conditional_feed(index_scope)
+@cache_anonymous_page(index_scope)
 def index(request):
-    post_list = Post.objects.all()
-    page_obj = paginate_queryset(post_list, request)
+    if timeline.is_enabled() and not settings.CURSOR_PAGINATION:
+        post_list = timeline.TimelineList(timeline.get(), timeline.queryset())
+        page_obj = paginate_queryset(post_list, request,
+                                     count=post_list.count)
+    elif use_concurrent_queries():
+        post_list = Post.objects.feed()
+        number = parallel.page_number(request)
+        count, rows = parallel.run(
+            Post.objects.count, parallel.page_rows(post_list, number)
+        )
+        page_obj = parallel.build_page(post_list, number, rows, count)
+    else:
+        page_obj = paginate_queryset(Post.objects.feed(), request)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@read_only
+@conditional_feed(group_scope)
+@cache_anonymous_page(group_scope)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('group')
-    page_obj = paginate_queryset(posts, request)
+    if use_concurrent_queries():
+        posts = Post.objects.feed().filter(group__slug=slug)
+        number = parallel.page_number(request)
+        group, rows = parallel.run(
+            lambda: lookups.get_group_or_404(slug),
+            parallel.page_rows(posts, number),
+        )
+        page_obj = parallel.build_page(posts, number, rows,
+                                       group.posts_count)
+    else:
+        group = lookups.get_group_or_404(slug)
+        posts = group.posts.feed()
+        page_obj = paginate_queryset(posts, request, count=group.posts_count)
     context = {
         'group': group,
         'posts': posts,
@@ -35,11 +91,48 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@read_only
+@conditional_feed(groups_scope)
+@cache_anonymous_page(groups_scope)
+def group_directory(request):
+    # Число постов и дату последнего поста хранит сама группа, а страницы
+    # листаются по ключу (last_activity, pk): любая страница — один
+    # запрос по индексу last_activity без OFFSET и COUNT(*).
+    groups = Group.objects.only(
+        'title', 'slug', 'posts_count', 'last_activity'
+    )
+    paginator = CursorPaginator(groups, settings.COUNT_GROUPS,
+                                ordering='-last_activity')
+    page_obj = paginator.get_page(after=request.GET.get('after'),
+                                  before=request.GET.get('before'))
+    return render(request, 'posts/group_directory.html',
+                  {'page_obj': page_obj})
+
+
+@read_only
+@conditional_feed(profile_scope)
+@cache_anonymous_page(profile_scope)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    author_posts = author.posts.select_related('author')
-    page_obj = paginate_queryset(author_posts, request)
-    posts_count = author_posts.count()
+    if use_concurrent_queries():
+        author_posts = Post.objects.feed().filter(author__username=username)
+        number = parallel.page_number(request)
+        author, rows, posts_count = parallel.run(
+            lambda: lookups.get_author_or_404(username),
+            parallel.page_rows(author_posts, number),
+            lambda: AuthorStats.objects.filter(
+                author__username=username
+            ).values_list('posts_count', flat=True).first(),
+        )
+        if posts_count is None:
+            posts_count = AuthorStats.count_for(author.pk)
+        page_obj = parallel.build_page(author_posts, number, rows,
+                                       posts_count)
+    else:
+        author = lookups.get_author_or_404(username)
+        author_posts = author.posts.feed()
+        posts_count = AuthorStats.count_for(author.pk)
+        page_obj = paginate_queryset(author_posts, request,
+                                     count=posts_count)
     context = {
         'author': author,
         'posts': author_posts,
@@ -49,13 +142,82 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        if post_search.is_available():
+            paginator = post_search.SearchPaginator(query,
+                                                    settings.COUNT_POSTS)
+        else:
+            paginator = CursorPaginator(
+                Post.objects.feed().filter(text__icontains=query),
+                settings.COUNT_POSTS
+            )
+        page_obj = paginator.get_page(after=request.GET.get('after'),
+                                      before=request.GET.get('before'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def export_posts(request):
+    if not request.user.is_staff:
+        raise PermissionDenied
+    file_format = request.GET.get('format', 'jsonl')
+    if file_format not in post_export.FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат')
+    since = after_id = None
+    if request.GET.get('since'):
+        since = post_export.parse_since(request.GET['since'])
+        if since is None:
+            return HttpResponseBadRequest('Неверная дата')
+    if request.GET.get('after_id'):
+        # Как в команде export_posts: id без даты не задаёт ключ.
+        if since is None or not request.GET['after_id'].isdigit():
+            return HttpResponseBadRequest(
+                'after_id — число и передаётся вместе с since'
+            )
+        after_id = int(request.GET['after_id'])
+    # Сжимаем сами и сообщаем об этом в Content-Encoding, так что
+    # GZipMiddleware ответ второй раз не сожмёт.
+    compress = bool(
+        ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    )
+    response = StreamingHttpResponse(
+        post_export.export(file_format, since=since, after_id=after_id,
+                           compress=compress),
+        content_type=post_export.CONTENT_TYPES[file_format]
+    )
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response['Content-Disposition'] = (
+        f'attachment; filename="posts.{file_format}"'
+    )
+    return response
+
+
+@read_only
+@conditional_post
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    posts_count = post.author.posts.count()
+    post, posts_count = parallel.run(
+        lambda: get_object_or_404(
+            Post.objects.select_related('author', 'group').defer('text'),
+            pk=post_id
+        ),
+        lambda: AuthorStats.objects.filter(author__posts=post_id).values_list(
+            'posts_count', flat=True
+        ).first(),
+    )
+    if posts_count is None:
+        posts_count = AuthorStats.count_for(post.author_id)
     context = {
         'post': post,
         'posts_count': posts_count,
-        'title': post.text[:30],
+        'title': post.excerpt[:30],
     }
     return render(request, 'posts/post_detail.html', context)
 
@@ -66,7 +228,7 @@ def post_create(request):
     if form.is_valid():
         form = form.save(commit=False)
         form.author = request.user
-        form.save()
+        writer.run(form.save)
         return redirect('posts:profile', request.user.username)
 
     return render(request, 'posts/create.html', {'form': form})
@@ -82,5 +244,5 @@ def post_edit(request, post_id):
             'form': form,
             'is_edit': True
         })
-    form.save()
+    writer.run(form.save)
     return redirect('posts:post_detail', post_id=post_id)
@@ -0,0 +1,16 @@
+"""Настройки проекта.
+
+Профиль выбирается переменной окружения YATUBE_PROFILE: dev (по
+умолчанию) для разработки и тестов, prod для боевого сервера. Общие
+настройки лежат в base.py.
+"""
+import os
+
+PROFILE = os.getenv('YATUBE_PROFILE', 'dev')
+
+if PROFILE == 'prod':
+    from .prod import *
+elif PROFILE == 'dev':
+    from .dev import *
+else:
+    raise ImportError(f'Неизвестный профиль настроек: {PROFILE}')
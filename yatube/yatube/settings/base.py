@@ -0,0 +1,194 @@
+"""Настройки, общие для всех профилей (см. __init__.py)."""
+import os
+
+
+COUNT_POSTS = 10
+# Групп на странице справочника групп
+COUNT_GROUPS = 30
+# Сколько секунд хранить отрисованные карточки постов
+POST_CARD_CACHE_TIMEOUT = 60 * 60
+# Кеш страниц лент для анонимов, секунды; 0 — выключен
+FEED_CACHE_TIMEOUT = 0
+# Сколько секунд отдавать устаревшую страницу, пока она перестраивается
+FEED_CACHE_STALE_TIMEOUT = 30
+# Сколько секунд хранить RSS/Atom; запись поста сбрасывает их и раньше
+SYNDICATION_CACHE_TIMEOUT = 60 * 60
+# Keyset-паджинация по ?after=/?before= вместо ?page=: без OFFSET и COUNT(*)
+CURSOR_PAGINATION = False
+# Сколько новейших постов главной держать готовыми в кеше; 0 — выключено
+TIMELINE_SIZE = 0
+# Сколько секунд лента живёт в кеше: правки держат её свежей, срок
+# лишь убирает расхождение, если правка потерялась
+TIMELINE_CACHE_TIMEOUT = 5 * 60
+# Выполнять записи постов из представлений в одном потоке процесса
+SERIALIZE_WRITES = False
+# Кеш поиска группы по slug и автора по username (posts/lookups.py), в
+# секундах: общий и в процессе (он же помнит «не найдено»); 0 — выключен
+LOOKUP_CACHE_TIMEOUT = 0
+LOOKUP_LOCAL_TIMEOUT = 5
+# Сколько записей держит LRU поиска в каждом процессе
+LOOKUP_LRU_SIZE = 1000
+# Потоков, обрабатывающих последствия записи постов (posts/outbox.py);
+# 0 — обработка в запросе, сразу после коммита
+OUTBOX_WORKERS = 0
+# Сколько раз пробовать событие и через сколько секунд повторять первый
+# раз; дальше задержка удваивается
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 1
+# Сколько секунд событие числится за взявшим его обработчиком
+OUTBOX_LEASE_SECONDS = 60
+# Сколько дней хранить обработанные события: их можно повторить
+# командой process_outbox --replay
+OUTBOX_RETENTION_DAYS = 7
+# Потоков для одновременных независимых запросов лент и поста;
+# 0 — запросы выполняются по очереди
+CONCURRENT_QUERIES = 0
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+
+DEBUG = False
+
+ALLOWED_HOSTS = []
+
+
+def _profile_url(user):
+    # Импорт при вызове: настройки читаются раньше, чем загружены
+    # приложения.
+    from posts.links import profile_url
+    return profile_url(user)
+
+
+# Ссылки на автора в шаблонах ведут в его профиль
+ABSOLUTE_URL_OVERRIDES = {'auth.user': _profile_url}
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+
+INSTALLED_APPS = [
+    'about.apps.AboutConfig',
+    'core.apps.CoreConfig',
+    'users.apps.UsersConfig',
+    'posts.apps.PostsConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+]
+
+MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.ReplicaStickinessMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+# Доля запросов, для которых RequestMetricsMiddleware снимает замеры
+METRICS_SAMPLE_RATE = 0.01
+# Токен для /metrics/ (заголовок Authorization: Bearer ...); без него
+# метрики видят только сотрудники
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+
+TEMPLATES = [
+    {
+        'BACKEND': 'core.template_backends.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+# Шаблоны, которые production-профиль компилирует при старте: карточка
+# поста подключается на каждой странице ленты.
+PRECOMPILED_TEMPLATES = [
+    'posts/index.html',
+    'posts/group_list.html',
+    'posts/profile.html',
+    'posts/post_detail.html',
+    'posts/includes/post_card.html',
+    'posts/includes/paginator.html',
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Сколько секунд ждать, пока другой процесс допишет, вместо
+        # мгновенной ошибки "database is locked".
+        'OPTIONS': {'timeout': 20},
+    }
+}
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Псевдонимы баз в DATABASES, с которых читают ленты и страницы постов
+DATABASE_REPLICAS = []
+# Сколько секунд после записи пользователь читает основную базу
+REPLICA_STICKY_SECONDS = 10
+REPLICA_STICKY_COOKIE = 'primary_db'
+
+# PRAGMA, которые core выполняет на каждом новом соединении с SQLite
+SQLITE_PRAGMAS = {}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # По умолчанию 300 записей: это меньше, чем карточек и их версий
+        # у страницы на 1000 постов.
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+STATIC_URL = '/static/'
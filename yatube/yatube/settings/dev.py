@@ -0,0 +1,9 @@
+"""Профиль для разработки и тестов."""
+from .base import *
+
+SECRET_KEY = 'xn$!2u6a@oi*ox!srb#l2ian^5myaxnk#55ge)tr^r0*e=)0sn'
+
+DEBUG = True
+
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
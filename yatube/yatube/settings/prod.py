@@ -0,0 +1,71 @@
+"""Профиль боевого сервера.
+
+Всё, что раньше правили руками при выкладке: постоянные соединения с
+базой, WAL и PRAGMA для SQLite, общий для процессов кеш, кеширующий
+загрузчик шаблонов, сжатие и условные GET.
+"""
+from core.template_backends import production_templates
+
+from .base import *
+
+SECRET_KEY = os.environ['SECRET_KEY']
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '').split()
+
+DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('CONN_MAX_AGE', 600))
+
+# Файлы реплик через пробел, например копии от litestream.
+for number, path in enumerate(os.getenv('DATABASE_REPLICAS', '').split()):
+    DATABASES[f'replica{number}'] = {**DATABASES['default'], 'NAME': path}
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+# busy timeout задаёт DATABASES['default']['OPTIONS']['timeout'] в base.py.
+SQLITE_PRAGMAS = {
+    # Читатели не ждут писателя, а писатель — читателей.
+    'journal_mode': 'wal',
+    # В режиме WAL это безопасно: теряются только последние транзакции
+    # при отключении питания, но не целостность базы.
+    'synchronous': 'normal',
+    # Кеш страниц 64 МиБ на соединение; отрицательное значение — КиБ.
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+    # Чтение через отображение файла в память, до 256 МиБ.
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+# Кеш общий для всех процессов сервера: поколения лент и версии карточек
+# должны сбрасываться сразу во всех. Блокировки ленты и перестройки
+# страниц (cache.add) держатся, только если add атомарен, как у memcached;
+# файловый кеш к тому же обходит весь каталог при каждой записи.
+# Серверы memcached через пробел.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', '127.0.0.1:11211').split(),
+    }
+}
+
+SERIALIZE_WRITES = True
+OUTBOX_WORKERS = 2
+
+FEED_CACHE_TIMEOUT = 60
+LOOKUP_CACHE_TIMEOUT = 5 * 60
+TIMELINE_SIZE = 100
+
+TEMPLATES = production_templates(TEMPLATES, PRECOMPILED_TEMPLATES)
+
+# GZip — до всего, что читает или меняет тело ответа, ConditionalGet —
+# после него, чтобы ETag считался по несжатому телу. Страницы с формами
+# сжимаются тоже: csrf-токен маскируется заново в каждом ответе, поэтому
+# BREACH его не извлечёт.
+MIDDLEWARE = MIDDLEWARE[:1] + [
+    'django.middleware.gzip.GZipMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+] + MIDDLEWARE[1:]
+
+STATIC_ROOT = os.getenv('STATIC_ROOT', os.path.join(BASE_DIR, 'static_root'))
+
+EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')